@@ -1,22 +1,33 @@
 # src/api/main.py
 
 from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from typing import List, Optional, Dict
 from datetime import datetime, timedelta
 from bson.objectid import ObjectId
+from pymongo import UpdateOne
+from motor.motor_asyncio import AsyncIOMotorClient
 
 from src.utils.database_handler import MedicalResearchDB
 from src.assistant.medical_research_assistant import MedicalResearchAssistant
+from src.data_fetchers.http_client import close_async_client
 
-from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from fastapi_cache import FastAPICache
+from fastapi_cache.backends.inmemory import InMemoryBackend
+from fastapi_cache.backends.redis import RedisBackend
+from fastapi_cache.decorator import cache
+from redis import asyncio as aioredis
+import asyncio
 import logging
+import orjson
+import os
 
 logging.basicConfig(
-    level=logging.INFO,
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
         logging.FileHandler('medical_research.log'),
@@ -28,7 +39,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="Medical Research Assistant API",
     description="API for medical research trends and queries",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS
@@ -40,6 +52,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class MongoJSONResponse(ORJSONResponse):
+    """ORJSONResponse that renders BSON values such as ObjectId as strings"""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(
+            content,
+            default=str,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+
 # Models
 class Query(BaseModel):
     text: str
@@ -56,8 +78,7 @@ class DailySummaries(BaseModel):
     clinical: Optional[str] = None
     research: Optional[str] = None
 
-    class Config:
-        extra = "allow"  # Allows additional fields in the response
+    model_config = ConfigDict(extra="allow")  # Allows additional fields in the response
 
 class QueryResponse(BaseModel):
     query: str
@@ -67,12 +88,16 @@ class QueryResponse(BaseModel):
 # Initialize components
 db = MedicalResearchDB()
 assistant = MedicalResearchAssistant()
-scheduler = BackgroundScheduler()
+scheduler = AsyncIOScheduler()
+
+# daily_analysis only changes once a day, so cached responses can live for an hour
+ANALYSIS_CACHE_NAMESPACE = "analyses"
+ANALYSIS_CACHE_TTL = 3600
 
 async def update_daily_analyses():
     """Background task to update analyses"""
     current_time = datetime.now()
-    logger.info(f"Starting scheduled update at {current_time}")
+    logger.info("Starting scheduled update at %s", current_time)
 
     try:
         # Define analysis types
@@ -82,50 +107,129 @@ async def update_daily_analyses():
             ("research", "research")
         ]
 
-        # Connect to DB once
-        db.connect()
+        collection = db.db["daily_analysis"]
 
         # Store today's date
         today = current_time.strftime("%Y-%m-%d")
 
-        for analysis_type, query_type in analyses_to_update:
-            try:
-                logger.info(f"Updating {analysis_type} for date {today}")
-                analysis = assistant.fetch_analysis(query_type)
-
-                if analysis:
-                    # Store with today's date
-                    success = db.store_daily_analysis(
-                        analysis_type,
-                        analysis,
-                        {
-                            "updated_at": current_time.isoformat(),
-                            "date": today,
-                            "analysis_type": analysis_type
-                        }
-                    )
-
-                    if success:
-                        logger.info(f"Successfully updated {analysis_type} for {today}")
-                    else:
-                        logger.error(f"Failed to store {analysis_type} analysis for {today}")
-                else:
-                    logger.error(f"No analysis content generated for {analysis_type}")
+        # Upserts are collected and written together after the loop
+        updates = []
+
+        async def previous_analysis(analysis_type, query_type):
+            logger.info("Updating %s for date %s", analysis_type, today)
+            return await asyncio.gather(
+                assistant.source_fingerprint(query_type),
+                collection.find_one(
+                    {"type": analysis_type},
+                    projection={"summary": 1, "content_hash": 1},
+                    sort=[("date", -1)]
+                )
+            )
+
+        # Fingerprint every analysis concurrently and reuse the last summary
+        # when none of its sources changed
+        checks = await asyncio.gather(
+            *(previous_analysis(analysis_type, query_type)
+              for analysis_type, query_type in analyses_to_update),
+            return_exceptions=True
+        )
 
-            except Exception as e:
-                logger.error(f"Error updating {analysis_type}: {str(e)}")
+        analyses = {}
+        content_hashes = {}
+        stale = []
+        for (analysis_type, query_type), check in zip(analyses_to_update, checks):
+            if isinstance(check, Exception):
+                logger.error("Error updating %s: %s", analysis_type, check)
+                continue
+
+            content_hash, previous = check
+            content_hashes[analysis_type] = content_hash
+            if previous and previous.get("content_hash") == content_hash:
+                logger.info("Sources unchanged for %s, reusing previous summary", analysis_type)
+                analyses[analysis_type] = previous["summary"]
+            else:
+                stale.append((analysis_type, query_type))
 
-        logger.info(f"Daily update completed for {today}")
+        if stale:
+            # Every changed analysis is summarized by one LLM call
+            try:
+                fetched = await assistant.fetch_analyses([query_type for _, query_type in stale])
+                for analysis_type, query_type in stale:
+                    analyses[analysis_type] = fetched[query_type]
+            except Exception as e:
+                logger.error("Error fetching analyses: %s", e)
+
+        for analysis_type, _ in analyses_to_update:
+            analysis = analyses.get(analysis_type)
+            if analysis:
+                # Store with today's date
+                document = db.build_daily_analysis(
+                    analysis_type,
+                    analysis,
+                    {
+                        "updated_at": current_time.isoformat(),
+                        "date": today,
+                        "analysis_type": analysis_type
+                    },
+                    content_hash=content_hashes[analysis_type],
+                    now=current_time
+                )
+                updates.append(UpdateOne(
+                    {"date": document["date"], "type": analysis_type},
+                    {"$set": document},
+                    upsert=True
+                ))
+            elif analysis_type in content_hashes:
+                logger.error("No analysis content generated for %s", analysis_type)
+
+        if updates:
+            # One round trip for every analysis type
+            await collection.bulk_write(updates, ordered=False)
+            logger.info("Stored %d analyses for %s", len(updates), today)
+
+        # Drop cached analysis responses so the new documents are served
+        await FastAPICache.clear(namespace=ANALYSIS_CACHE_NAMESPACE)
+
+        logger.info("Daily update completed for %s", today)
 
     except Exception as e:
-        logger.error(f"Error in daily update: {str(e)}")
-    finally:
-        db.close()
+        logger.error("Error in daily update: %s", e)
 
 @app.on_event("startup")
 async def startup_event():
     """Initialize scheduler and run initial check on startup"""
     try:
+        # Response cache for the analysis endpoints; fall back to process
+        # memory when no Redis instance is configured
+        redis_url = os.getenv("REDIS_URL")
+        if redis_url:
+            backend = RedisBackend(aioredis.from_url(redis_url))
+        else:
+            backend = InMemoryBackend()
+        FastAPICache.init(backend, prefix="mra")
+
+        # One pooled client for the lifetime of the app
+        app.state.mongo = AsyncIOMotorClient(db.uri, **MedicalResearchDB.CLIENT_OPTIONS)
+        db.connect(client=app.state.mongo)
+
+        try:
+            # Every analysis endpoint filters or sorts on date (and type);
+            # unique so the nightly upserts stay idempotent
+            await db.db["daily_analysis"].create_index(
+                [("date", -1), ("type", 1)],
+                name="date_type",
+                unique=True,
+                background=True
+            )
+        except Exception as index_error:
+            logger.error("Error creating daily_analysis index: %s", index_error)
+
+        try:
+            # Batch query history writes from /query and /query/stream
+            await assistant.db.start_query_flusher()
+        except Exception as flusher_error:
+            logger.error("Error starting query history flusher: %s", flusher_error)
+
         # Schedule daily update at midnight
         scheduler.add_job(
             update_daily_analyses,
@@ -135,104 +239,115 @@ async def startup_event():
             replace_existing=True
         )
 
+        # Startup runs on the server's event loop, which the scheduler adopts
+        # so the coroutine job is awaited there alongside request handlers
         scheduler.start()
         logger.info("Scheduler started successfully")
 
         try:
             # Run initial check
             status = await check_initial_update()
-            logger.info(f"Initial check complete: {status}")
+            logger.info("Initial check complete: %s", status)
         except Exception as check_error:
-            logger.error(f"Error during initial check: {check_error}")
+            logger.error("Error during initial check: %s", check_error)
             # Continue even if initial check fails
             # The scheduler is still running for future updates
 
     except Exception as e:
-        logger.error(f"Error during startup: {str(e)}")
+        logger.error("Error during startup: %s", e)
         raise
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Shutdown scheduler gracefully"""
+    """Shutdown scheduler and database client gracefully"""
     scheduler.shutdown()
     logger.info("Scheduler shut down")
+    app.state.mongo.close()
+    logger.info("MongoDB client closed")
+    # Drain queued query history before closing the sync client behind it
+    await assistant.db.stop_query_flusher()
+    MedicalResearchDB.close_client()
+    await close_async_client()
 
 @app.get("/analyses/dates", response_model=List[str])
+@cache(expire=ANALYSIS_CACHE_TTL, namespace=ANALYSIS_CACHE_NAMESPACE)
 async def get_analysis_dates():
     """Get list of available dates with analyses"""
     try:
-        db.connect()
         collection = db.db["daily_analysis"]
-        dates = collection.distinct("date")
+        dates = await collection.distinct("date")
         dates.sort(reverse=True)
         return dates
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        db.close()
 
-@app.get("/analyses/latest", response_model=DailySummaries)
+@app.get("/analyses/latest", response_model=DailySummaries, response_model_exclude_none=True)
+@cache(expire=ANALYSIS_CACHE_TTL, namespace=ANALYSIS_CACHE_NAMESPACE)
 async def get_latest_analyses():
     """Get the most recent analyses"""
     try:
-        db.connect()
         collection = db.db["daily_analysis"]
 
-        # Debug print
-        print("Fetching latest analyses...")
-
-        # Get the most recent date first
-        latest_date = collection.find_one(
-            sort=[("date", -1)]
-        )["date"]
-
-        print(f"Latest date found: {latest_date}")
-
-        # Now get all analyses for this date
-        result = DailySummaries(date=latest_date)
+        # Find the newest date with one index-backed lookup, then join every
+        # document stored for that date as {type: summary}, in one trip
+        pipeline = [
+            {"$sort": {"date": -1}},
+            {"$limit": 1},
+            {"$project": {"date": 1, "_id": 0}},
+            {"$lookup": {
+                "from": "daily_analysis",
+                "localField": "date",
+                "foreignField": "date",
+                "pipeline": [{"$project": {"k": "$type", "v": "$summary", "_id": 0}}],
+                "as": "doc"
+            }},
+            {"$project": {"date": 1, "data": {"$arrayToObject": "$doc"}}}
+        ]
+        rows = await collection.aggregate(pipeline).to_list(1)
 
-        # Fetch all documents for the latest date
-        latest_analyses = collection.find({"date": latest_date})
+        if not rows:
+            raise HTTPException(status_code=404, detail="No analyses found")
 
-        # Populate the result object
-        for analysis in latest_analyses:
-            print(f"Processing analysis type: {analysis['type']}")
-            if analysis["type"] == "recent_trends":
-                result.recent_trends = analysis["summary"]
-            elif analysis["type"] == "clinical":
-                result.clinical = analysis["summary"]
-            elif analysis["type"] == "research":
-                result.research = analysis["summary"]
-
-        return result
+        row = rows[0]
+        return DailySummaries.model_validate({"date": row["date"], **row["data"]})
 
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error in get_latest_analyses: {str(e)}")
+        logger.error("Error in get_latest_analyses: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Error retrieving latest analyses: {str(e)}"
         )
-    finally:
-        db.close()
 
 
 @app.get("/analyses/stats/summary")
+@cache(expire=ANALYSIS_CACHE_TTL, namespace=ANALYSIS_CACHE_NAMESPACE)
 async def get_analysis_stats():
     """Get summary statistics about available analyses"""
     try:
-        db.connect()
         collection = db.db["daily_analysis"]
 
-        total_docs = collection.count_documents({})
-        unique_dates = len(collection.distinct("date"))
-        analysis_types = collection.distinct("type")
-
-        type_counts = {}
-        for analysis_type in analysis_types:
-            type_counts[analysis_type] = collection.count_documents({"type": analysis_type})
+        # Every metric in a single round trip
+        pipeline = [
+            {"$facet": {
+                "total": [{"$count": "n"}],
+                "dates": [{"$group": {"_id": "$date"}}],
+                "types": [{"$group": {"_id": "$type", "count": {"$sum": 1}}}],
+                "latest": [
+                    {"$sort": {"date": -1}},
+                    {"$limit": 1},
+                    {"$project": {"date": 1}}
+                ]
+            }}
+        ]
+        stats = (await collection.aggregate(pipeline).to_list(1))[0]
 
-        latest_doc = collection.find_one(sort=[("date", -1)])
-        latest_date = latest_doc["date"] if latest_doc else None
+        total_docs = stats["total"][0]["n"] if stats["total"] else 0
+        unique_dates = len(stats["dates"])
+        type_counts = {row["_id"]: row["count"] for row in stats["types"]}
+        analysis_types = sorted(type_counts)
+        latest_date = stats["latest"][0]["date"] if stats["latest"] else None
 
         return {
             "total_analyses": total_docs,
@@ -244,47 +359,43 @@ async def get_analysis_stats():
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        db.close()
 
 
-@app.get("/analyses/{date}", response_model=DailySummaries)
+@app.get("/analyses/{date}", response_model=DailySummaries, response_model_exclude_none=True)
+@cache(expire=ANALYSIS_CACHE_TTL, namespace=ANALYSIS_CACHE_NAMESPACE)
 async def get_analyses_by_date(date: str):
     """Get all analyses for a specific date"""
     try:
-        db.connect()
         collection = db.db["daily_analysis"]
 
-        # Find all analyses for the given date
-        analyses = collection.find({"date": date})
+        # Find all analyses for the given date, only shipping what is used
+        analyses = collection.find(
+            {"date": date},
+            {"type": 1, "summary": 1, "_id": 0}
+        )
 
         result = DailySummaries(date=date)
         has_data = False
 
-        for analysis in analyses:
+        async for analysis in analyses:
             has_data = True
-            if analysis["type"] == "recent_trends":
-                result.recent_trends = analysis["summary"]
-            elif analysis["type"] == "clinical":
-                result.clinical = analysis["summary"]
-            elif analysis["type"] == "research":
-                result.research = analysis["summary"]
+            setattr(result, analysis["type"], analysis["summary"])
 
         if not has_data:
             raise HTTPException(status_code=404, detail=f"No analyses found for date: {date}")
 
         return result
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        db.close()
 
 @app.post("/query", response_model=QueryResponse)
 async def process_query(query: Query):
     """Process a user query"""
     try:
-        response = assistant.answer_specific_query(query.text)
+        response = await assistant.answer_specific_query(query.text)
 
         return QueryResponse(
             query=query.text,
@@ -295,6 +406,14 @@ async def process_query(query: Query):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/query/stream")
+async def process_query_stream(query: Query):
+    """Process a user query, streaming the response text as it is generated"""
+    return StreamingResponse(
+        assistant.answer_specific_query_stream(query.text),
+        media_type="text/plain"
+    )
+
 @app.post("/update-analyses")
 async def trigger_update(background_tasks: BackgroundTasks):
     """Manually trigger analyses update"""
@@ -313,39 +432,36 @@ async def trigger_update(background_tasks: BackgroundTasks):
         }
 
     except Exception as e:
-        logger.error(f"Error triggering update: {e}")
+        logger.error("Error triggering update: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/debug/database")
+@app.get("/debug/database", response_class=MongoJSONResponse)
 async def debug_database():
     """Debug endpoint to check database content"""
     try:
-        db.connect()
         collection = db.db["daily_analysis"]
 
-        # Get all documents, sorted by date
-        all_docs = list(collection.find().sort("date", -1))
-
-        # Convert ObjectId to string for JSON serialization
-        for doc in all_docs:
-            doc["_id"] = str(doc["_id"])
-
-        return {
-            "total_documents": len(all_docs),
-            "sample_documents": all_docs[:5],  # Show first 5 documents
-            "unique_dates": collection.distinct("date"),
-            "unique_types": collection.distinct("type"),
+        # Only the five newest documents are shown, let the server limit them
+        sample_docs = await collection.find(
+            {},
+            {"_id": 1, "date": 1, "type": 1, "summary": 1}
+        ).sort("date", -1).limit(5).to_list(5)
+
+        # Returned directly so orjson stringifies the ObjectIds while encoding
+        return MongoJSONResponse({
+            "total_documents": await collection.estimated_document_count(),
+            "sample_documents": sample_docs,
+            "unique_dates": await collection.distinct("date"),
+            "unique_types": await collection.distinct("type"),
             "collection_name": collection.name,
             "database_name": db.db.name
-        }
+        })
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Error accessing database: {str(e)}"
         )
-    finally:
-        db.close()
 
 @app.get("/scheduler/status")
 async def get_scheduler_status():
@@ -374,53 +490,49 @@ async def get_scheduler_status():
 async def check_initial_update():
     """Check initial update status and calculate next update time"""
     try:
-        today = datetime.now().date()
+        current_time = datetime.now()
+        today = current_time.date()
+        today_str = today.strftime("%Y-%m-%d")
         midnight = datetime.min.time()
         next_run = datetime.combine(today + timedelta(days=1), midnight)
-        current_time = datetime.now()
         time_until_next = next_run - current_time
 
         total_seconds = time_until_next.total_seconds()
         hours = int(total_seconds // 3600)
         minutes = int((total_seconds % 3600) // 60)
 
-        try:
-            db.connect()
-            collection = db.db["daily_analysis"]
+        collection = db.db["daily_analysis"]
 
-            # Check for today's data specifically
-            todays_data = collection.find_one({"date": today.strftime("%Y-%m-%d")})
+        # Only existence matters; stop at the first match of today's date
+        todays_data = await collection.count_documents({"date": today_str}, limit=1)
 
-            needs_update = True if not todays_data else False
+        needs_update = True if not todays_data else False
 
-            if needs_update:
-                logger.info(f"No data found for today ({today}), triggering update...")
-                # Run update directly instead of using background tasks
-                await update_daily_analyses()
-                message = "Initial update completed. "
-            else:
-                logger.info("Today's data is already present")
-                message = "Data is up to date. "
-
-            next_update_time = next_run.strftime('%Y-%m-%d %H:%M:%S')
-            message += f"Next update scheduled for {next_update_time}"
-            logger.info(message)
-
-            return {
-                "message": message,
-                "next_update": next_run.isoformat(),
-                "hours_until_next": hours,
-                "minutes_until_next": minutes,
-                "needs_update": needs_update,
-                "current_time": current_time.isoformat(),
-                "next_update_time": next_update_time
-            }
-
-        finally:
-            db.close()
+        if needs_update:
+            logger.info("No data found for today (%s), triggering update...", today)
+            # Run update directly instead of using background tasks
+            await update_daily_analyses()
+            message = "Initial update completed. "
+        else:
+            logger.info("Today's data is already present")
+            message = "Data is up to date. "
+
+        next_update_time = next_run.strftime('%Y-%m-%d %H:%M:%S')
+        message += f"Next update scheduled for {next_update_time}"
+        logger.info(message)
+
+        return {
+            "message": message,
+            "next_update": next_run.isoformat(),
+            "hours_until_next": hours,
+            "minutes_until_next": minutes,
+            "needs_update": needs_update,
+            "current_time": current_time.isoformat(),
+            "next_update_time": next_update_time
+        }
 
     except Exception as e:
-        logger.error(f"Error in initial check: {str(e)}")
+        logger.error("Error in initial check: %s", e)
         raise HTTPException(
             status_code=500,
             detail=f"Error checking initial update: {str(e)}"
@@ -431,7 +543,7 @@ async def handle_exceptions(request: Request, call_next):
     try:
         return await call_next(request)
     except Exception as e:
-        logger.error(f"Global error: {str(e)}")
+        logger.error("Global error: %s", e)
         return JSONResponse(
             status_code=500,
             content={"detail": "Internal server error. Service is starting up, please try again in a few moments."}
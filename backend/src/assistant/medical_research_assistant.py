@@ -1,12 +1,16 @@
 # src/assistant/medical_research_assistant.py
 
 import os
-from typing import Dict
+import re
+import asyncio
+import hashlib
+import logging
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
 from langchain_google_genai import GoogleGenerativeAI
-from langchain.agents import Tool
-from langchain.prompts import PromptTemplate
-from langchain.chains import LLMChain
-import json
+from langchain.globals import set_llm_cache
+from langchain_community.cache import SQLiteCache
 from datetime import datetime
 from dotenv import load_dotenv
 
@@ -18,7 +22,27 @@ from ..data_fetchers.cdc_fetcher import CDCFetcher
 from ..data_fetchers.nih_fetcher import NIHFetcher
 from ..utils.database_handler import MedicalResearchDB
 
+# The fetchers are blocking I/O; run them on a shared pool so the five
+# sources are queried concurrently instead of one after another. The pool
+# holds every source for CONCURRENT_QUERIES requests at once, so users do not
+# queue behind each other. LLM and database calls run via asyncio.to_thread
+# and never occupy a fetch worker.
+SOURCE_COUNT = 5
+CONCURRENT_QUERIES = int(os.getenv("CONCURRENT_QUERIES", "8"))
+TOOL_WORKERS = SOURCE_COUNT * CONCURRENT_QUERIES
+_tool_executor = ThreadPoolExecutor(max_workers=TOOL_WORKERS,
+                                    thread_name_prefix="research-tool")
+
+logger = logging.getLogger(__name__)
+
+# Gemini tends to wrap JSON replies in a markdown code fence
+_JSON_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$")
+
 class MedicalResearchAssistant:
+    # Sources whose content does not depend on the query; a batched prompt
+    # carries them once instead of once per analysis
+    _QUERY_FREE_SOURCES = ("research_papers", "cdc_data")
+
     def __init__(self, gemini_api_key: str = None, pubmed_api_key: str = None):
         """Initialize the Medical Research Assistant"""
         load_dotenv()
@@ -36,6 +60,9 @@ class MedicalResearchAssistant:
             temperature=0.3
         )
 
+        # Identical prompts are answered from disk instead of re-hitting Gemini
+        set_llm_cache(SQLiteCache(database_path=os.getenv("LLM_CACHE_PATH", "llm_cache.db")))
+
         # Initialize data fetchers
         self.pubmed_fetcher = PubMedFetcher(self.pubmed_api_key)
         self.trials_fetcher = ClinicalTrialsFetcher()
@@ -43,6 +70,15 @@ class MedicalResearchAssistant:
         self.cdc_fetcher = CDCFetcher()
         self.nih_fetcher = NIHFetcher()
 
+        # Raw content per source; MedRxiv and CDC ignore the query
+        self._fetchers = {
+            "pubmed": self.pubmed_fetcher.fetch_and_summarize,
+            "clinical_trials": self.trials_fetcher.fetch_and_summarize_trials,
+            "research_papers": lambda query: self.medrxiv_fetcher.fetch_and_summarize_rare_disease_papers(),
+            "cdc_data": lambda query: self.cdc_fetcher.fetch_and_summarize_rare_diseases(),
+            "nih": self.nih_fetcher.fetch_and_summarize_nih_projects
+        }
+
         # Initialize database connection
         self.db = MedicalResearchDB()
 
@@ -50,105 +86,25 @@ class MedicalResearchAssistant:
         self._setup_tools()
 
     def _setup_tools(self):
-        """Setup tools for the LangChain agent"""
-        self.tools = {
-            "pubmed": Tool(
-                name="analyze_pubmed",
-                func=self.analyze_pubmed_content,
-                description="Extracts insights from PubMed research articles"
-            ),
-            "clinical_trials": Tool(
-                name="analyze_trials",
-                func=self.analyze_trial_content,
-                description="Analyzes clinical trials related to rare diseases"
-            ),
-            "research_papers": Tool(
-                name="analyze_papers",
-                func=self.analyze_paper_content,
-                description="Summarizes findings from MedRxiv/BioRxiv research papers"
-            ),
-            "cdc_data": Tool(
-                name="analyze_cdc_data",
-                func=self.analyze_disease_content,
-                description="Analyzes CDC surveillance data for disease trends"
-            ),
-            "nih": Tool(
-                name="analyze_nih",
-                func=self.analyze_nih_content,
-                description="Summarizes NIH-funded projects relevant to the query"
-            )
-        }
-
-    def analyze_pubmed_content(self, query: str) -> str:
-        """Analyze PubMed content using LLM"""
-        print("Fetching data from PubMed...")
-        content = self.pubmed_fetcher.fetch_and_summarize(query)
-        if not content:
-            return None
-        prompt = PromptTemplate(
-            template="Summarize recent PubMed research on {query}:\n\n{content}",
-            input_variables=["query", "content"]
-        )
-        chain = LLMChain(llm=self.llm, prompt=prompt)
-        return chain.invoke({"query": query, "content": content})["text"]
-
-    def analyze_trial_content(self, query: str) -> str:
-        """Analyze clinical trial content using LLM"""
-        print("Fetching clinical trial data...")
-        content = self.trials_fetcher.fetch_and_summarize_trials(query)
-        if not content:
-            return None
-        prompt = PromptTemplate(
-            template="Analyze these clinical trials related to {query}:\n\n{content}",
-            input_variables=["query", "content"]
-        )
-        chain = LLMChain(llm=self.llm, prompt=prompt)
-        return chain.invoke({"query": query, "content": content})["text"]
-
-    def analyze_paper_content(self, query: str) -> str:
-        """Analyze research paper content using LLM"""
-        print("Fetching research papers...")
-        content = self.medrxiv_fetcher.fetch_and_summarize_rare_disease_papers()
-        if not content:
-            return None
-        prompt = PromptTemplate(
-            template="Analyze these research papers related to {query}:\n\n{content}",
-            input_variables=["query", "content"]
-        )
-        chain = LLMChain(llm=self.llm, prompt=prompt)
-        return chain.invoke({"query": query, "content": content})["text"]
-
-    def analyze_disease_content(self, query: str) -> str:
-        """Analyze CDC disease content using LLM"""
-        print("Fetching CDC data...")
-        content = self.cdc_fetcher.fetch_and_summarize_rare_diseases()
-        if not content:
-            return None
-        prompt = PromptTemplate(
-            template="Analyze this CDC disease data related to {query}:\n\n{content}",
-            input_variables=["query", "content"]
-        )
-        chain = LLMChain(llm=self.llm, prompt=prompt)
-        return chain.invoke({"query": query, "content": content})["text"]
-
-    def analyze_nih_content(self, query: str) -> str:
-        """Analyze NIH project content using LLM"""
-        print("Fetching NIH data...")
-        content = self.nih_fetcher.fetch_and_summarize_nih_projects(query)
-        if not content:
-            return None
-        prompt = PromptTemplate(
-            template="Analyze these NIH research projects related to {query}:\n\n{content}",
-            input_variables=["query", "content"]
+        """Setup the (name, callable) source tools
+
+        Tools only fetch source content; everything is summarized by a single
+        LLM call over the combined overview.
+        """
+        self._tool_fns: Tuple[Tuple[str, Callable[[str], str]], ...] = (
+            ("pubmed", self.analyze_pubmed_content),
+            ("clinical_trials", self.analyze_trial_content),
+            ("research_papers", self.analyze_paper_content),
+            ("cdc_data", self.analyze_disease_content),
+            ("nih", self.analyze_nih_content)
         )
-        chain = LLMChain(llm=self.llm, prompt=prompt)
-        return chain.invoke({"query": query, "content": content})["text"]
 
-    def summarize_response(self, raw_response: str, query: str) -> str:
-        """Process raw response through LLM for a concise summary"""
-        summary_prompt = PromptTemplate(
-            template="""Please analyze and synthesize the following medical research information into a clear, concise response.
+        # Prompts are plain format strings fed straight to the LLM
+        self._templates = {
+            "summary": """Please analyze and synthesize the following medical research information into a clear, concise response.
             Focus on the most relevant and important points related to the query.
+            The information is raw data grouped by source (PubMed articles, clinical trials,
+            MedRxiv/BioRxiv papers, CDC surveillance data and NIH projects).
 
             Query: {query}
 
@@ -163,24 +119,105 @@ class MedicalResearchAssistant:
             5. Is easy to understand
 
             Response should include:
+            - A short breakdown of what each source contributes
             - Key findings or developments
             - Important research outcomes
             - Clinical implications (if applicable)
             - Relevant statistics or data points
             """,
-            input_variables=["query", "raw_response"]
+            "batch_summary": """Please analyze and synthesize each of the following medical research analyses into a clear, concise response.
+            Each analysis has its own query and raw data grouped by source (PubMed articles, clinical trials
+            and NIH projects). MedRxiv/BioRxiv papers and CDC surveillance data do not depend on the query,
+            so they are given once below and apply to every analysis.
+
+            Shared Information:
+            {shared}
+
+            {sections}
+
+            For each analysis, provide a well-structured response that:
+            1. Prioritizes the most relevant findings
+            2. Highlights key clinical or research developments
+            3. Removes redundant information
+            4. Maintains scientific accuracy
+            5. Is easy to understand
+
+            Each response should include:
+            - A short breakdown of what each source contributes
+            - Key findings or developments
+            - Important research outcomes
+            - Clinical implications (if applicable)
+            - Relevant statistics or data points
+
+            Reply with only a JSON object whose keys are exactly {keys} and whose
+            values are the responses as strings.
+            """
+        }
+
+    def _fetch(self, source: str, query: str) -> str:
+        """Fetch a source's formatted content
+
+        The fetchers cache successful summaries for an hour and never cache
+        failures, so an outage is retried on the next call.
+        """
+        return self._fetchers[source](query)
+
+    def analyze_pubmed_content(self, query: str) -> str:
+        """Fetch PubMed content for the summarizer"""
+        logger.debug("Fetching data from PubMed...")
+        return self._fetch("pubmed", query)
+
+    def analyze_trial_content(self, query: str) -> str:
+        """Fetch clinical trial content for the summarizer"""
+        logger.debug("Fetching clinical trial data...")
+        return self._fetch("clinical_trials", query)
+
+    def analyze_paper_content(self, query: str) -> str:
+        """Fetch research paper content for the summarizer"""
+        logger.debug("Fetching research papers...")
+        return self._fetch("research_papers", query)
+
+    def analyze_disease_content(self, query: str) -> str:
+        """Fetch CDC disease content for the summarizer"""
+        logger.debug("Fetching CDC data...")
+        return self._fetch("cdc_data", query)
+
+    def analyze_nih_content(self, query: str) -> str:
+        """Fetch NIH project content for the summarizer"""
+        logger.debug("Fetching NIH data...")
+        return self._fetch("nih", query)
+
+    def summarize_response(self, raw_response: str, query: str) -> str:
+        """Process raw response through LLM for a concise summary"""
+        prompt = self._templates["summary"].format(query=query, raw_response=raw_response)
+        return self.llm.invoke(prompt)
+
+    async def summarize_response_stream(self, raw_response: str, query: str) -> AsyncIterator[str]:
+        """Stream the summary from the LLM chunk by chunk as it is generated"""
+        prompt = self._templates["summary"].format(query=query, raw_response=raw_response)
+        async for chunk in self.llm.astream(prompt):
+            yield chunk
+
+    async def _run_tools(self, query: str) -> Dict[str, str]:
+        """Run every tool concurrently and collect the non-empty results"""
+        loop = asyncio.get_running_loop()
+        results = await asyncio.gather(
+            *(loop.run_in_executor(_tool_executor, fn, query)
+              for _, fn in self._tool_fns),
+            return_exceptions=True
         )
 
-        chain = LLMChain(llm=self.llm, prompt=summary_prompt)
-        summary = chain.invoke({
-            "query": query,
-            "raw_response": raw_response
-        })["text"]
+        analysis_results = {}
+        for (tool_name, _), result in zip(self._tool_fns, results):
+            if isinstance(result, Exception):
+                logger.error("Error with %s: %s", tool_name, result)
+            elif result:
+                analysis_results[tool_name] = result
 
-        return summary
+        return analysis_results
 
-    def fetch_analysis(self, analysis_type: str) -> str:
-        """Fetch analysis for trends, clinical, or general research"""
+    def _analysis_query(self, analysis_type: str) -> str:
+        """Map an analysis type to the query sent to every source"""
         query = ""
         if analysis_type == "recent_trends":
             query = "current trends in rare disease research"
@@ -188,63 +225,191 @@ class MedicalResearchAssistant:
             query = "latest clinical trials and treatments for rare diseases"
         elif analysis_type == "research":
             query = "current medical research on rare diseases"
+        return query
+
+    async def source_fingerprint(self, analysis_type: str) -> str:
+        """Hash today's source content for an analysis to detect no-op updates
+
+        The fetchers cache their content, so a following fetch_analysis call
+        only pays for the single summary LLM call.
+        """
+        query = self._analysis_query(analysis_type)
+        loop = asyncio.get_running_loop()
+        contents = await asyncio.gather(
+            *(loop.run_in_executor(_tool_executor, self._fetch, source, query)
+              for source in self._fetchers),
+            return_exceptions=True
+        )
 
-        print(f"\nFetching {analysis_type} analysis...")
-        analysis_results = {}
+        digest = hashlib.sha256()
+        for content in contents:
+            if isinstance(content, str):
+                digest.update(content.encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
 
-        for tool_name, tool in self.tools.items():
-            try:
-                result = tool.func(query)
-                if result:
-                    analysis_results[tool_name] = result
-            except Exception as e:
-                print(f"Error with {tool_name}: {e}")
-                continue
+    async def fetch_analysis(self, analysis_type: str) -> str:
+        """Fetch analysis for trends, clinical, or general research"""
+        query = self._analysis_query(analysis_type)
+
+        logger.debug("Fetching %s analysis...", analysis_type)
+        analysis_results = await self._run_tools(query)
 
         if not analysis_results:
             return None
 
         raw_response = self._format_overview(f"{analysis_type.capitalize()} Analysis",
                                          analysis_results)
-        return self.summarize_response(raw_response, query)
+        return await asyncio.to_thread(self.summarize_response, raw_response, query)
+
+    async def fetch_analyses(self, analysis_types: List[str]) -> Dict[str, Optional[str]]:
+        """Fetch several analyses with a single summary LLM call
+
+        Source content for every analysis is gathered concurrently, then one
+        prompt asks for all the summaries as a JSON object keyed by analysis
+        type. Types missing from the reply, or every type when the batched
+        call fails, fall back to their own call.
+
+        Returns:
+            Mapping of analysis type to its summary, None when no source
+            returned content
+        """
+        queries = {analysis_type: self._analysis_query(analysis_type)
+                   for analysis_type in analysis_types}
+        logger.debug("Fetching %s analyses...", ", ".join(analysis_types))
+        results = await asyncio.gather(
+            *(self._run_tools(queries[analysis_type]) for analysis_type in analysis_types)
+        )
 
-    def answer_specific_query(self, query: str) -> str:
+        results = {analysis_type: analysis_results
+                   for analysis_type, analysis_results in zip(analysis_types, results)
+                   if analysis_results}
+        # Full per-type overviews, used if an analysis has to be summarized alone
+        raw_responses = {
+            analysis_type: self._format_overview(f"{analysis_type.capitalize()} Analysis",
+                                                 analysis_results)
+            for analysis_type, analysis_results in results.items()
+        }
+        analyses = dict.fromkeys(analysis_types)
+        if not raw_responses:
+            return analyses
+
+        shared = {}
+        for analysis_results in results.values():
+            for source in self._QUERY_FREE_SOURCES:
+                if source in analysis_results:
+                    shared.setdefault(source, analysis_results[source])
+
+        sections = []
+        for analysis_type, analysis_results in results.items():
+            specific = {source: content for source, content in analysis_results.items()
+                        if source not in self._QUERY_FREE_SOURCES}
+            raw_response = (self._format_overview(f"{analysis_type.capitalize()} Analysis", specific)
+                            or "No query-specific sources returned content.")
+            sections.append(f"=== ANALYSIS: {analysis_type} ===\nQuery: {queries[analysis_type]}\n\n"
+                            f"Raw Information:\n{raw_response}")
+
+        prompt = self._templates["batch_summary"].format(
+            shared=self._format_overview("Shared Information", shared) or "None",
+            sections="\n\n".join(sections),
+            keys=", ".join(f'"{analysis_type}"' for analysis_type in raw_responses)
+        )
+
+        try:
+            reply = await asyncio.to_thread(self.llm.invoke, prompt)
+            summaries = orjson.loads(_JSON_FENCE_RE.sub("", reply))
+        except orjson.JSONDecodeError as e:
+            logger.warning("Batched analysis reply is not JSON, summarizing one by one: %s", e)
+            summaries = {}
+        except Exception as e:
+            # A quota error or an over-size prompt must not lose every analysis
+            logger.error("Batched analysis call failed, summarizing one by one: %s", e)
+            summaries = {}
+        if not isinstance(summaries, dict):
+            summaries = {}
+
+        missing = []
+        for analysis_type in raw_responses:
+            summary = summaries.get(analysis_type)
+            if isinstance(summary, str) and summary:
+                analyses[analysis_type] = summary
+            else:
+                missing.append(analysis_type)
+
+        fallbacks = await asyncio.gather(
+            *(asyncio.to_thread(self.summarize_response,
+                                raw_responses[analysis_type], queries[analysis_type])
+              for analysis_type in missing),
+            return_exceptions=True
+        )
+        for analysis_type, summary in zip(missing, fallbacks):
+            if isinstance(summary, Exception):
+                logger.error("Error summarizing %s analysis: %s", analysis_type, summary)
+            else:
+                analyses[analysis_type] = summary
+
+        return analyses
+
+    async def answer_specific_query(self, query: str) -> str:
         """Answer specific user query with enhanced processing"""
+        logger.debug("Gathering information from multiple sources...")
+        analysis_results = await self._run_tools(query)
+
+        if not analysis_results:
+            return "I couldn't find enough relevant information to answer your query."
+
+        raw_response = self._format_overview("Analysis Results", analysis_results)
+        final_response = await asyncio.to_thread(self.summarize_response, raw_response, query)
+        await asyncio.to_thread(self._store_query_result, query, final_response)
+
+        return final_response
+
+    async def answer_specific_query_stream(self, query: str) -> AsyncIterator[str]:
+        """Answer a user query, yielding the summary while it is generated
+
+        The full response is stored in the query history once the stream
+        has been drained. If generation fails, the response headers are
+        already sent, so the error is logged and ends the body as a short
+        error line instead, and nothing is stored. A failure to store the
+        finished response is only logged.
+        """
+        logger.debug("Gathering information from multiple sources...")
+        analysis_results = await self._run_tools(query)
+
+        if not analysis_results:
+            yield "I couldn't find enough relevant information to answer your query."
+            return
+
+        raw_response = self._format_overview("Analysis Results", analysis_results)
+        chunks = []
         try:
-            self.db.connect()
-
-            print("\nGathering information from multiple sources...")
-            analysis_results = {}
-
-            for tool_name, tool in self.tools.items():
-                try:
-                    result = tool.func(query)
-                    if result:
-                        analysis_results[tool_name] = result
-                except Exception as e:
-                    print(f"Error with {tool_name}: {e}")
-                    continue
-
-            if not analysis_results:
-                return "I couldn't find enough relevant information to answer your query."
-
-            raw_response = self._format_overview("Analysis Results", analysis_results)
-            final_response = self.summarize_response(raw_response, query)
-
-            self.db.store_query_result(
-                query=query,
-                response=final_response,
-                metadata={
-                    "timestamp": datetime.now(),
-                    "query_type": "specific",
-                    "sources_used": list(self.tools.keys())
-                }
-            )
-
-            return final_response
-
-        finally:
-            self.db.close()
+            async for chunk in self.summarize_response_stream(raw_response, query):
+                chunks.append(chunk)
+                yield chunk
+        except Exception as e:
+            logger.error("Error streaming response for query %r: %s", query, e)
+            yield f"\n\nError: the response could not be completed ({e})"
+            return
+
+        # The body is complete by now; a history write failure must not cut it off
+        try:
+            await asyncio.to_thread(self._store_query_result, query, "".join(chunks))
+        except Exception as e:
+            logger.error("Error storing streamed response for query %r: %s", query, e)
+
+    def _store_query_result(self, query: str, response: str) -> None:
+        """Persist an answered query to the query history"""
+        # Binds to the shared client once; later calls reuse it
+        self.db.connect()
+        self.db.store_query_result(
+            query=query,
+            response=response,
+            metadata={
+                "timestamp": datetime.now(),
+                "query_type": "specific",
+                "sources_used": [name for name, _ in self._tool_fns]
+            }
+        )
 
     def _format_overview(self, title: str, analysis: dict) -> str:
         """Format analysis results for LLM processing"""
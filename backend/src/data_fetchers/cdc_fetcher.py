@@ -1,8 +1,129 @@
 # src/data_fetchers/cdc_fetcher.py
 
-from typing import List, Dict
+from typing import Final, List, Dict
 from collections import defaultdict
 
+import numpy as np
+
+# One distribution row: label, case count, share of the disease's cases
+_ROW_FMT = "  {}: {:,} cases ({:.1f}%)".format
+_COUNT_FMT = "{:,}".format
+_SEPARATOR = "\n" + "-" * 50
+
+# Read-only sample data, built once at import
+_SAMPLE_DATA: Final[dict] = {
+    "rare_diseases": [
+        {
+            "disease_name": "Gaucher Disease",
+            "category": "Lysosomal Storage Disorders",
+            "year": 2024,
+            "total_cases": 178,
+            "age_distribution": {
+                "0-17": 45,
+                "18-44": 82,
+                "45-64": 38,
+                "65+": 13
+            },
+            "gender_distribution": {
+                "Male": 85,
+                "Female": 93
+            },
+            "mortality_rate": 3.2,
+            "prevalence": "1 in 50,000"
+        },
+        {
+            "disease_name": "Fabry Disease",
+            "category": "Lysosomal Storage Disorders",
+            "year": 2024,
+            "total_cases": 245,
+            "age_distribution": {
+                "0-17": 56,
+                "18-44": 112,
+                "45-64": 58,
+                "65+": 19
+            },
+            "gender_distribution": {
+                "Male": 142,
+                "Female": 103
+            },
+            "mortality_rate": 4.5,
+            "prevalence": "1 in 40,000"
+        },
+        {
+            "disease_name": "Pompe Disease",
+            "category": "Metabolic Disorders",
+            "year": 2024,
+            "total_cases": 156,
+            "age_distribution": {
+                "0-17": 67,
+                "18-44": 52,
+                "45-64": 28,
+                "65+": 9
+            },
+            "gender_distribution": {
+                "Male": 83,
+                "Female": 73
+            },
+            "mortality_rate": 7.8,
+            "prevalence": "1 in 65,000"
+        },
+        {
+            "disease_name": "Niemann-Pick Disease",
+            "category": "Lysosomal Storage Disorders",
+            "year": 2024,
+            "total_cases": 132,
+            "age_distribution": {
+                "0-17": 58,
+                "18-44": 45,
+                "45-64": 22,
+                "65+": 7
+            },
+            "gender_distribution": {
+                "Male": 71,
+                "Female": 61
+            },
+            "mortality_rate": 8.5,
+            "prevalence": "1 in 75,000"
+        },
+        {
+            "disease_name": "Hunter Syndrome",
+            "category": "Metabolic Disorders",
+            "year": 2024,
+            "total_cases": 98,
+            "age_distribution": {
+                "0-17": 42,
+                "18-44": 35,
+                "45-64": 15,
+                "65+": 6
+            },
+            "gender_distribution": {
+                "Male": 89,
+                "Female": 9
+            },
+            "mortality_rate": 6.2,
+            "prevalence": "1 in 100,000"
+        }
+    ]
+}
+
+
+def _parse(response_data: dict) -> Dict[str, List[Dict]]:
+    """Organize CDC disease records by category"""
+    if 'rare_diseases' not in response_data:
+        return {}
+
+    categories = defaultdict(list)
+    for disease in response_data['rare_diseases']:
+        category = disease.get('category', 'Uncategorized')
+        categories[category].append(disease)
+
+    return dict(categories)
+
+
+# The sample data is static, so its categorization is done once at import
+_PARSED: Final[Dict[str, List[Dict]]] = _parse(_SAMPLE_DATA)
+
+
 class CDCFetcher:
     def fetch_cdc_rare_disease_data(self) -> dict:
         """
@@ -11,166 +132,110 @@ class CDCFetcher:
         return self.generate_sample_data()
 
     def generate_sample_data(self) -> dict:
-        """Generate comprehensive sample rare disease data for demonstration"""
-        return {
-            "rare_diseases": [
-                {
-                    "disease_name": "Gaucher Disease",
-                    "category": "Lysosomal Storage Disorders",
-                    "year": 2024,
-                    "total_cases": 178,
-                    "age_distribution": {
-                        "0-17": 45,
-                        "18-44": 82,
-                        "45-64": 38,
-                        "65+": 13
-                    },
-                    "gender_distribution": {
-                        "Male": 85,
-                        "Female": 93
-                    },
-                    "mortality_rate": 3.2,
-                    "prevalence": "1 in 50,000"
-                },
-                {
-                    "disease_name": "Fabry Disease",
-                    "category": "Lysosomal Storage Disorders",
-                    "year": 2024,
-                    "total_cases": 245,
-                    "age_distribution": {
-                        "0-17": 56,
-                        "18-44": 112,
-                        "45-64": 58,
-                        "65+": 19
-                    },
-                    "gender_distribution": {
-                        "Male": 142,
-                        "Female": 103
-                    },
-                    "mortality_rate": 4.5,
-                    "prevalence": "1 in 40,000"
-                },
-                {
-                    "disease_name": "Pompe Disease",
-                    "category": "Metabolic Disorders",
-                    "year": 2024,
-                    "total_cases": 156,
-                    "age_distribution": {
-                        "0-17": 67,
-                        "18-44": 52,
-                        "45-64": 28,
-                        "65+": 9
-                    },
-                    "gender_distribution": {
-                        "Male": 83,
-                        "Female": 73
-                    },
-                    "mortality_rate": 7.8,
-                    "prevalence": "1 in 65,000"
-                },
-                {
-                    "disease_name": "Niemann-Pick Disease",
-                    "category": "Lysosomal Storage Disorders",
-                    "year": 2024,
-                    "total_cases": 132,
-                    "age_distribution": {
-                        "0-17": 58,
-                        "18-44": 45,
-                        "45-64": 22,
-                        "65+": 7
-                    },
-                    "gender_distribution": {
-                        "Male": 71,
-                        "Female": 61
-                    },
-                    "mortality_rate": 8.5,
-                    "prevalence": "1 in 75,000"
-                },
-                {
-                    "disease_name": "Hunter Syndrome",
-                    "category": "Metabolic Disorders",
-                    "year": 2024,
-                    "total_cases": 98,
-                    "age_distribution": {
-                        "0-17": 42,
-                        "18-44": 35,
-                        "45-64": 15,
-                        "65+": 6
-                    },
-                    "gender_distribution": {
-                        "Male": 89,
-                        "Female": 9
-                    },
-                    "mortality_rate": 6.2,
-                    "prevalence": "1 in 100,000"
-                }
-            ]
-        }
+        """Return comprehensive sample rare disease data for demonstration
+
+        The shared module-level data is returned as is and must not be mutated.
+        """
+        return _SAMPLE_DATA
 
     def parse_rare_disease_data(self, response_data: dict) -> Dict[str, List[Dict]]:
         """Parse CDC data and organize by disease category"""
-        if 'rare_diseases' not in response_data:
-            return {}
+        if response_data is _SAMPLE_DATA:
+            return _PARSED
+        return _parse(response_data)
 
-        categories = defaultdict(list)
-        for disease in response_data['rare_diseases']:
-            category = disease.get('category', 'Uncategorized')
-            categories[category].append(disease)
+    def _to_soa(self, data: Dict[str, List[Dict]]) -> dict:
+        """Lay the parsed diseases out as column arrays for vectorized statistics
 
-        return dict(categories)
+        Rows follow the order diseases are formatted in; distribution labels
+        map to matrix columns through the *_index dicts.
+        """
+        diseases = [disease for category_diseases in data.values() for disease in category_diseases]
+        age_index = {label: i for i, label in enumerate(
+            dict.fromkeys(k for d in diseases for k in d['age_distribution']))}
+        gender_index = {label: i for i, label in enumerate(
+            dict.fromkeys(k for d in diseases for k in d['gender_distribution']))}
+
+        return {
+            "names": np.array([d['disease_name'] for d in diseases], dtype=object),
+            "total_cases": np.array([d['total_cases'] for d in diseases], dtype=np.int64),
+            "age_counts": np.array(
+                [[d['age_distribution'].get(k, 0) for k in age_index] for d in diseases],
+                dtype=np.int64).reshape(len(diseases), len(age_index)),
+            "gender_counts": np.array(
+                [[d['gender_distribution'].get(k, 0) for k in gender_index] for d in diseases],
+                dtype=np.int64).reshape(len(diseases), len(gender_index)),
+            "age_index": age_index,
+            "gender_index": gender_index
+        }
 
     def format_rare_disease_summary(self, data: Dict[str, List[Dict]]) -> str:
         """Format the parsed rare disease data into a readable summary"""
         if not data:
             return "No rare disease data available"
 
-        summary = []
-        summary.append("=== CDC Rare Disease Surveillance Summary ===\n")
+        soa = self._to_soa(data)
+        case_counts = soa["total_cases"]
+        total_cases = int(case_counts.sum())
+        n_diseases = len(case_counts)
 
-        # Calculate total cases across all categories
-        total_cases = sum(
-            disease['total_cases']
-            for category_diseases in data.values()
-            for disease in category_diseases
-        )
+        # Every distribution percentage in one broadcast per matrix
+        inv = 100.0 / case_counts[:, None]
+        age_pct = (soa["age_counts"] * inv).tolist()
+        gender_pct = (soa["gender_counts"] * inv).tolist()
+        age_index = soa["age_index"]
+        gender_index = soa["gender_index"]
+        # Thousands-separated totals formatted in one pass, indexed per row
+        total_strs = [_COUNT_FMT(tc) for tc in case_counts.tolist()]
 
-        summary.append(f"Total Rare Disease Cases Monitored: {total_cases:,}\n")
+        summary = []
+        append = summary.append
+        append("=== CDC Rare Disease Surveillance Summary ===\n")
+        append(f"Total Rare Disease Cases Monitored: {_COUNT_FMT(total_cases)}\n")
 
+        row = 0
         for category, diseases in data.items():
-            summary.append(f"\n{category}")
-            summary.append("=" * len(category))
+            append(f"\n{category}")
+            append("=" * len(category))
 
             for disease in diseases:
-                summary.append(f"\nDisease: {disease['disease_name']}")
-                summary.append(f"Total Cases: {disease['total_cases']:,}")
-                summary.append(f"Prevalence: {disease['prevalence']}")
-                summary.append(f"Mortality Rate: {disease['mortality_rate']}%")
+                append(f"\nDisease: {disease['disease_name']}")
+                append(f"Total Cases: {total_strs[row]}")
+                append(f"Prevalence: {disease['prevalence']}")
+                append(f"Mortality Rate: {disease['mortality_rate']}%")
 
-                summary.append("\nAge Distribution:")
+                append("\nAge Distribution:")
+                pct = age_pct[row]
                 for age_group, count in disease['age_distribution'].items():
-                    percentage = (count / disease['total_cases']) * 100
-                    summary.append(f"  {age_group}: {count:,} cases ({percentage:.1f}%)")
+                    append(_ROW_FMT(age_group, count, pct[age_index[age_group]]))
 
-                summary.append("\nGender Distribution:")
+                append("\nGender Distribution:")
+                pct = gender_pct[row]
                 for gender, count in disease['gender_distribution'].items():
-                    percentage = (count / disease['total_cases']) * 100
-                    summary.append(f"  {gender}: {count:,} cases ({percentage:.1f}%)")
+                    append(_ROW_FMT(gender, count, pct[gender_index[gender]]))
 
-                summary.append("\n" + "-" * 50)
+                append(_SEPARATOR)
+                row += 1
 
         # Add summary statistics
-        summary.append("\nSummary Statistics")
-        summary.append("=" * 16)
-        summary.append(f"Total Disease Categories: {len(data)}")
-        summary.append(f"Total Diseases Monitored: {sum(len(diseases) for diseases in data.values())}")
-        summary.append(f"Average Cases per Disease: {total_cases / sum(len(diseases) for diseases in data.values()):,.1f}")
+        append("\nSummary Statistics")
+        append("=" * 16)
+        append(f"Total Disease Categories: {len(data)}")
+        append(f"Total Diseases Monitored: {n_diseases}")
+        append(f"Average Cases per Disease: {total_cases / n_diseases:,.1f}")
 
         return "\n".join(summary)
 
     def fetch_and_summarize_rare_diseases(self) -> str:
         """Fetch CDC rare disease data and return a formatted summary"""
         response_data = self.fetch_cdc_rare_disease_data()
+        if response_data is _SAMPLE_DATA:
+            return _SUMMARY
         if response_data:
             parsed_data = self.parse_rare_disease_data(response_data)
             return self.format_rare_disease_summary(parsed_data)
-        return "Failed to fetch data from CDC API"
\ No newline at end of file
+        return "Failed to fetch data from CDC API"
+
+
+# Summary of the static sample data; real CDC responses are formatted per call
+_SUMMARY: Final[str] = CDCFetcher().format_rare_disease_summary(_PARSED)
@@ -1,9 +1,18 @@
+import httpx
+import orjson
 import requests
 import json
-from typing import List, Dict
+from typing import List, Dict, Optional
 
-class ClinicalTrialsFetcher:
+from .http_client import HTTPFetcher, REQUEST_TIMEOUT, get_async_client
+from .summary_cache import cached_summary
+
+# Returned when nothing could be fetched; never cached
+NO_RESULTS = "No results found or error occurred"
+
+class ClinicalTrialsFetcher(HTTPFetcher):
     def __init__(self):
+        super().__init__()
         self.base_url = "https://clinicaltrials.gov/api/v2/studies"
 
     def fetch_clinical_trials(self, condition: str, max_results: int = 5) -> dict:
@@ -18,11 +27,34 @@ class ClinicalTrialsFetcher:
                 "accept": "application/json"
             }
 
-            response = requests.get(self.base_url, params=params, headers=headers)
+            response = self.session.get(self.base_url, params=params, headers=headers,
+                                        timeout=REQUEST_TIMEOUT)
             response.raise_for_status()
-            return response.json()
+            return orjson.loads(response.content)
 
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+            print(f"Error: {e}")
+            return None
+
+    async def afetch_clinical_trials(self, condition: str, max_results: int = 5,
+                                     client: Optional[httpx.AsyncClient] = None) -> dict:
+        """Async variant of fetch_clinical_trials over the shared HTTP/2 client"""
+        client = client or get_async_client()
+        try:
+            params = {
+                "query.cond": condition,
+                "pageSize": max_results,
+                "format": "json"
+            }
+            headers = {
+                "accept": "application/json"
+            }
+
+            response = await client.get(self.base_url, params=params, headers=headers)
+            response.raise_for_status()
+            return orjson.loads(response.content)
+
+        except (httpx.HTTPError, orjson.JSONDecodeError) as e:
             print(f"Error: {e}")
             return None
 
@@ -92,48 +124,65 @@ class ClinicalTrialsFetcher:
     def format_trial_summary(self, trials: List[Dict]) -> str:
         """Format the parsed trials into a readable summary"""
         summary = []
+        append = summary.append
 
         for trial in trials:
-            summary.append("\n=== Clinical Trial Summary ===")
-            summary.append(f"NCT ID: {trial.get('nct_id', 'N/A')}")
-            summary.append(f"Title: {trial.get('title', 'N/A')}")
-            summary.append(f"Status: {trial.get('status', 'N/A')}")
-            summary.append(f"Start Date: {trial.get('start_date', 'N/A')}")
-            summary.append(f"Sponsor: {trial.get('sponsor', 'N/A')}")
-
-            if trial.get('conditions'):
-                summary.append(f"Conditions: {', '.join(trial['conditions'])}")
-
-            if trial.get('keywords'):
-                summary.append(f"Keywords: {', '.join(trial['keywords'])}")
-
-            if trial.get('phases'):
-                summary.append(f"Phase: {', '.join(trial['phases'])}")
-
-            summary.append(f"Enrollment: {trial.get('enrollment', 'N/A')} participants")
-
-            if trial.get('interventions'):
-                summary.append("\nInterventions:")
-                for intervention in trial['interventions']:
-                    summary.append(f"- {intervention['type']}: {intervention['name']}")
-
-            if trial.get('brief_summary'):
-                summary.append("\nBrief Summary:")
-                summary.append(trial['brief_summary'])
-
-            summary.append("\nEligibility:")
-            eligibility = trial.get('eligibility', {})
-            summary.append(f"Gender: {eligibility.get('gender', 'N/A')}")
-            summary.append(f"Age: {eligibility.get('min_age', 'N/A')} - {eligibility.get('max_age', 'N/A')}")
-
-            summary.append("\n")
+            get = trial.get
+            append("\n=== Clinical Trial Summary ===")
+            append(f"NCT ID: {get('nct_id', 'N/A')}")
+            append(f"Title: {get('title', 'N/A')}")
+            append(f"Status: {get('status', 'N/A')}")
+            append(f"Start Date: {get('start_date', 'N/A')}")
+            append(f"Sponsor: {get('sponsor', 'N/A')}")
+
+            conditions = get('conditions')
+            if conditions:
+                append(f"Conditions: {', '.join(conditions)}")
+
+            keywords = get('keywords')
+            if keywords:
+                append(f"Keywords: {', '.join(keywords)}")
+
+            phases = get('phases')
+            if phases:
+                append(f"Phase: {', '.join(phases)}")
+
+            append(f"Enrollment: {get('enrollment', 'N/A')} participants")
+
+            interventions = get('interventions')
+            if interventions:
+                append("\nInterventions:")
+                for intervention in interventions:
+                    append(f"- {intervention['type']}: {intervention['name']}")
+
+            brief_summary = get('brief_summary')
+            if brief_summary:
+                append("\nBrief Summary:")
+                append(brief_summary)
+
+            append("\nEligibility:")
+            eligibility = get('eligibility', {})
+            append(f"Gender: {eligibility.get('gender', 'N/A')}")
+            append(f"Age: {eligibility.get('min_age', 'N/A')} - {eligibility.get('max_age', 'N/A')}")
+
+            append("\n")
 
         return "\n".join(summary)
 
+    @cached_summary(NO_RESULTS)
     def fetch_and_summarize_trials(self, condition: str, max_results: int = 5) -> str:
         """Fetch clinical trials data and return a formatted summary"""
         response_data = self.fetch_clinical_trials(condition, max_results)
         if response_data:
             trials = self.parse_clinical_trials(response_data)
             return self.format_trial_summary(trials)
-        return "No results found or error occurred"
\ No newline at end of file
+        return NO_RESULTS
+
+    async def afetch_and_summarize_trials(self, condition: str, max_results: int = 5,
+                                          client: Optional[httpx.AsyncClient] = None) -> str:
+        """Async variant of fetch_and_summarize_trials"""
+        response_data = await self.afetch_clinical_trials(condition, max_results, client)
+        if response_data:
+            trials = self.parse_clinical_trials(response_data)
+            return self.format_trial_summary(trials)
+        return NO_RESULTS
\ No newline at end of file
@@ -0,0 +1,68 @@
+import asyncio
+import os
+from typing import Dict, Optional
+
+import httpx
+
+from .cdc_fetcher import CDCFetcher
+from .clinicaltrials_fetcher import NO_RESULTS as TRIALS_FAILED, ClinicalTrialsFetcher
+from .http_client import create_async_client, get_async_client
+from .medrxiv_fetcher import FETCH_FAILED as MEDRXIV_FAILED, MedRxivFetcher
+from .nih_fetcher import FETCH_FAILED as NIH_FAILED, NIHFetcher
+from .pubmed_fetcher import NO_RESULTS as PUBMED_FAILED, PubMedFetcher
+
+
+async def fetch_all(query: str,
+                    pubmed_api_key: Optional[str] = None,
+                    client: Optional[httpx.AsyncClient] = None) -> Dict[str, str]:
+    """Fetch formatted summaries from every source concurrently
+
+    The sources are independent, so total latency is that of the slowest
+    one rather than the sum of all five. A source that raises is replaced by
+    its failure message instead of discarding the others.
+
+    Returns:
+        Mapping of source name to its formatted summary
+    """
+    client = client or get_async_client()
+    pubmed = PubMedFetcher(pubmed_api_key or os.getenv('PUBMED_API_KEY'))
+    trials = ClinicalTrialsFetcher()
+    medrxiv = MedRxivFetcher()
+    nih = NIHFetcher()
+
+    # CDC data is local sample data, no request to await
+    cdc_summary = CDCFetcher().fetch_and_summarize_rare_diseases()
+
+    failures = (PUBMED_FAILED, TRIALS_FAILED, MEDRXIV_FAILED, NIH_FAILED)
+    results = await asyncio.gather(
+        pubmed.afetch_and_summarize(query, client=client),
+        trials.afetch_and_summarize_trials(query, client=client),
+        medrxiv.afetch_and_summarize_rare_disease_papers(client=client),
+        nih.afetch_and_summarize_nih_projects(query, client=client),
+        return_exceptions=True
+    )
+    summaries = []
+    for result, failure in zip(results, failures):
+        if isinstance(result, Exception):
+            print(f"Error: {result}")
+            result = failure
+        summaries.append(result)
+    pubmed_summary, trials_summary, papers_summary, nih_summary = summaries
+
+    return {
+        "pubmed": pubmed_summary,
+        "clinical_trials": trials_summary,
+        "research_papers": papers_summary,
+        "cdc_data": cdc_summary,
+        "nih": nih_summary
+    }
+
+
+def fetch_all_sync(query: str, pubmed_api_key: Optional[str] = None) -> Dict[str, str]:
+    """Blocking wrapper around fetch_all for code without an event loop"""
+    async def run():
+        # A dedicated client, the shared one belongs to the app's loop
+        async with create_async_client() as client:
+            return await fetch_all(query, pubmed_api_key, client)
+
+    return asyncio.run(run())
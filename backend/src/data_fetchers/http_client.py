@@ -0,0 +1,124 @@
+import asyncio
+import threading
+from collections import deque
+from time import monotonic, sleep
+from typing import Optional
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (connect, read) seconds; a hung connection fails instead of stalling a worker
+REQUEST_TIMEOUT = (3.05, 30)
+
+_async_client: Optional[httpx.AsyncClient] = None
+
+
+def create_session() -> requests.Session:
+    """Create a keep-alive session that pools connections and retries transient errors
+
+    Rate-limited (429) and gateway errors are retried with exponential
+    backoff, honouring any Retry-After header. POST is retried too, since
+    every POST here is a read-only search.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 502, 503, 504],
+            allowed_methods=["GET", "POST"]
+        )
+    )
+    session.mount("https://", adapter)
+    session.headers.update({"Connection": "keep-alive"})
+    return session
+
+
+def create_async_client() -> httpx.AsyncClient:
+    """Create an HTTP/2 client with a keep-alive connection pool"""
+    return httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=20),
+        timeout=httpx.Timeout(REQUEST_TIMEOUT[1], connect=REQUEST_TIMEOUT[0])
+    )
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the process-wide async client, creating it on first use
+
+    The client is bound to the event loop it is first used on; code that
+    runs its own short-lived loop should pass a dedicated client instead.
+    """
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        _async_client = create_async_client()
+    return _async_client
+
+
+async def close_async_client():
+    """Close the process-wide async client"""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+
+class RateLimiter:
+    """Sliding-window limiter allowing `rate` requests per `period` seconds
+
+    Callers reserve the next free slot under a lock and then sleep until it,
+    so sync and async callers share the same budget.
+    """
+
+    def __init__(self, rate: int, period: float = 1.0):
+        self.rate = rate
+        self.period = period
+        self._calls = deque()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Reserve a slot and return how long to wait for it"""
+        with self._lock:
+            now = monotonic()
+            calls = self._calls
+            while calls and now - calls[0] >= self.period:
+                calls.popleft()
+
+            start = now
+            if len(calls) >= self.rate:
+                start = max(start, calls[-self.rate] + self.period)
+            if calls:
+                start = max(start, calls[-1])
+            calls.append(start)
+            return start - now
+
+    def wait(self):
+        delay = self._reserve()
+        if delay > 0:
+            sleep(delay)
+
+    async def async_wait(self):
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class HTTPFetcher:
+    """Base for fetchers that reuse one pooled session for every request"""
+
+    def __init__(self):
+        self.session = create_session()
+
+    def close(self):
+        """Close the session and its pooled connections"""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
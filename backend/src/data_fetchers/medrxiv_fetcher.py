@@ -1,10 +1,41 @@
+import httpx
+import ijson
+import orjson
 import requests
-from typing import List, Dict
+import urllib3
+from typing import Iterable, List, Dict, Optional, Union
 from datetime import datetime
 import re
+import textwrap
+
+from .http_client import HTTPFetcher, REQUEST_TIMEOUT, get_async_client
+from .summary_cache import cached_summary
+
+# Returned when the source could not be reached; never cached
+FETCH_FAILED = "Failed to fetch data from MedRxiv API"
+
+# Abstracts are wrapped to 80 columns on whitespace only; hyphenated terms
+# and long tokens such as URLs stay whole
+_WRAPPER = textwrap.TextWrapper(width=80, break_long_words=False,
+                               break_on_hyphens=False, drop_whitespace=True)
+
+class MedRxivFetcher(HTTPFetcher):
+    # Pre-lowercased rare disease keywords
+    _KEYWORDS = (
+        'rare disease', 'rare disorder', 'orphan disease', 'rare genetic',
+        'rare mutation', 'rare syndrome', 'rare condition',
+        'ultra-rare', 'rare inherited', 'rare metabolic'
+    )
+
+    # All keywords in one case-insensitive scan; no trailing boundary so
+    # plurals such as "rare diseases" still match
+    _RARE_RE = re.compile(
+        r"\b(?:" + "|".join(re.escape(k).replace(r"\ ", r"\s+") for k in _KEYWORDS) + ")",
+        re.IGNORECASE
+    )
 
-class MedRxivFetcher:
     def __init__(self):
+        super().__init__()
         self.base_url = "https://api.biorxiv.org/details/medrxiv"
 
     def fetch_medrxiv_data(self, start_date: str = "2024-01-01",
@@ -13,33 +44,78 @@ class MedRxivFetcher:
         """Fetch data from MedRxiv/BioRxiv API"""
         try:
             url = f"{self.base_url}/{start_date}/{end_date}/{cursor}"
-            response = requests.get(url)
+            response = self.session.get(url, timeout=REQUEST_TIMEOUT)
             response.raise_for_status()
-            return response.json()
+            return orjson.loads(response.content)
 
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+            print(f"Error: {e}")
+            return None
+
+    async def afetch_medrxiv_data(self, start_date: str = "2024-01-01",
+                                  end_date: str = "2024-12-31",
+                                  cursor: int = 0,
+                                  client: Optional[httpx.AsyncClient] = None) -> dict:
+        """Async variant of fetch_medrxiv_data over the shared HTTP/2 client"""
+        client = client or get_async_client()
+        try:
+            url = f"{self.base_url}/{start_date}/{end_date}/{cursor}"
+            response = await client.get(url)
+            response.raise_for_status()
+            return orjson.loads(response.content)
+
+        except (httpx.HTTPError, orjson.JSONDecodeError) as e:
+            print(f"Error: {e}")
+            return None
+
+    def fetch_rare_disease_papers(self, start_date: str = "2024-01-01",
+                                  end_date: str = "2024-12-31",
+                                  cursor: int = 0) -> Optional[List[Dict]]:
+        """Fetch one page of MedRxiv papers, keeping only rare disease ones
+
+        Papers are decoded one at a time as the body streams in and
+        non-matching ones are dropped immediately, so the full collection is
+        never held in memory. Returns None if the request fails.
+        """
+        try:
+            url = f"{self.base_url}/{start_date}/{end_date}/{cursor}"
+            with self.session.get(url, stream=True, timeout=REQUEST_TIMEOUT) as response:
+                response.raise_for_status()
+                response.raw.decode_content = True
+                return self.parse_medrxiv_papers(
+                    ijson.items(response.raw, 'collection.item', use_float=True)
+                )
+
+        # ijson reads response.raw directly, so urllib3 errors mid-body
+        # (read timeouts, dropped connections, bad gzip) are not wrapped
+        except (requests.exceptions.RequestException, urllib3.exceptions.HTTPError,
+                ijson.JSONError) as e:
             print(f"Error: {e}")
             return None
 
     def is_rare_disease_paper(self, paper: Dict) -> bool:
         """Check if a paper is related to rare diseases"""
-        rare_disease_keywords = [
-            'rare disease', 'rare disorder', 'orphan disease', 'rare genetic',
-            'rare mutation', 'rare syndrome', 'rare condition',
-            'ultra-rare', 'rare inherited', 'rare metabolic'
-        ]
-
-        text_to_search = f"{paper.get('title', '')} {paper.get('abstract', '')}".lower()
-        return any(keyword.lower() in text_to_search for keyword in rare_disease_keywords)
-
-    def parse_medrxiv_papers(self, response_data: dict) -> List[Dict]:
-        """Parse MedRxiv JSON response and extract rare disease related papers"""
-        if not response_data or 'collection' not in response_data:
+        text_to_search = f"{paper.get('title') or ''} {paper.get('abstract') or ''}"
+        return self._RARE_RE.search(text_to_search) is not None
+
+    def parse_medrxiv_papers(self, response_data: Union[dict, Iterable[dict]]) -> List[Dict]:
+        """Parse MedRxiv JSON response and extract rare disease related papers
+
+        Accepts either a full response dict or an iterable of raw papers.
+        """
+        if not response_data:
             return []
 
+        if isinstance(response_data, dict):
+            if 'collection' not in response_data:
+                return []
+            collection = response_data['collection']
+        else:
+            collection = response_data
+
         rare_disease_papers = []
 
-        for paper in response_data['collection']:
+        for paper in collection:
             if self.is_rare_disease_paper(paper):
                 paper_data = {
                     'title': paper.get('title'),
@@ -61,50 +137,49 @@ class MedRxivFetcher:
             return "No rare disease related papers found in the specified time period."
 
         summary = []
-        summary.append(f"\n=== Rare Disease Research Papers (Total: {len(papers)}) ===\n")
+        append = summary.append
+        append(f"\n=== Rare Disease Research Papers (Total: {len(papers)}) ===\n")
+
+        rule = "-" * 50
+        footer = "\n" + "=" * 80 + "\n"
 
         for i, paper in enumerate(papers, 1):
-            summary.append(f"Paper {i}:")
-            summary.append("-" * 50)
-            summary.append(f"Title: {paper.get('title', 'N/A')}")
-            summary.append(f"Authors: {paper.get('authors', 'N/A')}")
-            summary.append(f"Date: {paper.get('date', 'N/A')}")
-            summary.append(f"Category: {paper.get('category', 'N/A')}")
-            summary.append(f"Institution: {paper.get('institution', 'N/A')}")
-            summary.append(f"DOI: {paper.get('doi', 'N/A')}")
-
-            if paper.get('abstract'):
-                summary.append("\nAbstract:")
-                # Word wrap abstract
-                words = paper['abstract'].split()
-                lines = []
-                current_line = []
-                line_length = 0
-
-                for word in words:
-                    if line_length + len(word) + 1 <= 80:
-                        current_line.append(word)
-                        line_length += len(word) + 1
-                    else:
-                        lines.append(" ".join(current_line))
-                        current_line = [word]
-                        line_length = len(word)
-
-                if current_line:
-                    lines.append(" ".join(current_line))
-
-                summary.extend(lines)
-
-            summary.append("\n" + "=" * 80 + "\n")
+            get = paper.get
+            append(f"Paper {i}:")
+            append(rule)
+            append(f"Title: {get('title', 'N/A')}")
+            append(f"Authors: {get('authors', 'N/A')}")
+            append(f"Date: {get('date', 'N/A')}")
+            append(f"Category: {get('category', 'N/A')}")
+            append(f"Institution: {get('institution', 'N/A')}")
+            append(f"DOI: {get('doi', 'N/A')}")
+
+            abstract = get('abstract')
+            if abstract:
+                append("\nAbstract:")
+                summary.extend(_WRAPPER.wrap(abstract))
+
+            append(footer)
 
         return "\n".join(summary)
 
+    @cached_summary(FETCH_FAILED)
     def fetch_and_summarize_rare_disease_papers(self,
                                               start_date: str = "2024-01-01",
                                               end_date: str = "2024-12-31") -> str:
         """Fetch MedRxiv data and return a formatted summary of rare disease papers"""
-        response_data = self.fetch_medrxiv_data(start_date, end_date)
+        papers = self.fetch_rare_disease_papers(start_date, end_date)
+        if papers is not None:
+            return self.format_paper_summary(papers)
+        return FETCH_FAILED
+
+    async def afetch_and_summarize_rare_disease_papers(self,
+                                                       start_date: str = "2024-01-01",
+                                                       end_date: str = "2024-12-31",
+                                                       client: Optional[httpx.AsyncClient] = None) -> str:
+        """Async variant of fetch_and_summarize_rare_disease_papers"""
+        response_data = await self.afetch_medrxiv_data(start_date, end_date, client=client)
         if response_data:
             papers = self.parse_medrxiv_papers(response_data)
             return self.format_paper_summary(papers)
-        return "Failed to fetch data from MedRxiv API"
\ No newline at end of file
+        return FETCH_FAILED
\ No newline at end of file
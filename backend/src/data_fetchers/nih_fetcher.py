@@ -1,74 +1,205 @@
+import httpx
+import orjson
 import requests
+import urllib3
+import ijson
 import json
-from typing import List, Dict
+from typing import Iterable, Iterator, List, Dict, Optional, Union
 import textwrap
+from concurrent.futures import ThreadPoolExecutor
+
+from .http_client import HTTPFetcher, REQUEST_TIMEOUT, RateLimiter, get_async_client
+from .summary_cache import cached_summary
+
+# Returned when the source could not be reached; never cached
+FETCH_FAILED = "Failed to fetch data from NIH RePORTER API"
+
+class NIHFetcher(HTTPFetcher):
+    HEADERS = {
+        'Content-Type': 'application/json',
+        'Accept': 'application/json'
+    }
+
+    # RePORTER serves at most 500 results per page and 15,000 per search
+    PAGE_SIZE = 500
+    MAX_RESULTS = 15_000
+    PAGE_WORKERS = 8
+
+    # RePORTER asks clients for about one request per second; shared by all
+    # instances since the limit is per client, not per fetcher
+    _pacer = RateLimiter(1)
 
-class NIHFetcher:
     def __init__(self):
+        super().__init__()
         self.base_url = "https://api.reporter.nih.gov/v2/projects/search"
 
+    # Built once; textwrap.fill would construct a new wrapper per call
+    _TITLE_WRAP = textwrap.TextWrapper(width=65)
+    _ABSTRACT_WRAP = textwrap.TextWrapper(width=65, initial_indent='  ', subsequent_indent='  ')
+
+    # (threshold, suffix) pairs, largest first
+    _CURRENCY_SCALES = ((1_000_000, "M"), (1_000, "K"))
+
     def format_currency(self, amount: float) -> str:
         """Format currency with appropriate suffix for large numbers"""
-        if amount >= 1_000_000:
-            return f"${amount/1_000_000:.1f}M"
-        elif amount >= 1_000:
-            return f"${amount/1_000:.1f}K"
-        else:
-            return f"${amount:.2f}"
+        for threshold, suffix in self._CURRENCY_SCALES:
+            if amount >= threshold:
+                return f"${amount/threshold:.1f}{suffix}"
+        return f"${amount:.2f}"
+
+    def _build_payload(self, search_term: str, limit: int, offset: int = 0) -> dict:
+        """Build the RePORTER project search request body"""
+        return {
+            "criteria": {
+                "text_search_criteria": [{
+                    "search_field": "all",
+                    "search_text": search_term
+                }],
+                "fiscal_years": [2024, 2023, 2022, 2021, 2020]  # Last 5 years
+            },
+            "include_fields": [
+                "fiscal_year",
+                "award_amount",
+                "project_title",
+                "abstract_text",
+                "ContactPIName",
+                "OrganizationName"
+            ],
+            "offset": offset,
+            "limit": limit,
+            "sort_field": "fiscal_year",
+            "sort_order": "desc"
+        }
 
     def fetch_nih_reporter(self, search_term: str, limit: int = 5) -> dict:
         """Fetch rare disease research data from NIH RePORTER"""
         try:
-            payload = {
-                "criteria": {
-                    "text_search_criteria": [{
-                        "search_field": "all",
-                        "search_text": search_term
-                    }],
-                    "fiscal_years": [2024, 2023, 2022, 2021, 2020]  # Last 5 years
-                },
-                "include_fields": [
-                    "fiscal_year",
-                    "award_amount",
-                    "project_title",
-                    "abstract_text",
-                    "ContactPIName",
-                    "OrganizationName"
-                ],
-                "offset": 0,
-                "limit": limit,
-                "sort_field": "fiscal_year",
-                "sort_order": "desc"
-            }
+            payload = self._build_payload(search_term, limit)
 
-            headers = {
-                'Content-Type': 'application/json',
-                'Accept': 'application/json'
-            }
+            response = self.session.post(self.base_url, json=payload, headers=self.HEADERS,
+                                         timeout=REQUEST_TIMEOUT)
+            response.raise_for_status()
+            return orjson.loads(response.content)
+
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+            print(f"Error accessing NIH RePORTER API: {e}")
+            return None
+
+    def _fetch_page(self, search_term: str, offset: int, limit: int) -> dict:
+        """POST one page of search results, paced to the RePORTER rate limit"""
+        self._pacer.wait()
+        response = self.session.post(self.base_url, json=self._build_payload(search_term, limit, offset),
+                                     headers=self.HEADERS, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        return orjson.loads(response.content)
 
-            response = requests.post(self.base_url, json=payload, headers=headers)
+    def fetch_all(self, search_term: str = "rare diseases", total: Optional[int] = None) -> dict:
+        """Fetch up to `total` projects (default: every match) across result pages
+
+        The first page reports meta.total; the remaining pages are requested
+        concurrently over the shared session. Request starts stay paced, while
+        the pool keeps several slow responses in flight. A page that fails is
+        reported and skipped.
+
+        Returns:
+            Response-shaped dict with the first page's meta and all results,
+            or None if the first page could not be fetched
+        """
+        first_limit = self.PAGE_SIZE if total is None else max(1, min(total, self.PAGE_SIZE))
+        try:
+            first_page = self._fetch_page(search_term, 0, first_limit)
+        except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+            print(f"Error accessing NIH RePORTER API: {e}")
+            return None
+
+        meta = first_page.get('meta', {})
+        wanted = min(meta.get('total', 0), self.MAX_RESULTS)
+        if total is not None:
+            wanted = min(wanted, total)
+
+        def fetch_offset(offset: int) -> list:
+            try:
+                page = self._fetch_page(search_term, offset, min(self.PAGE_SIZE, wanted - offset))
+                return page.get('results', [])
+            except (requests.exceptions.RequestException, orjson.JSONDecodeError) as e:
+                print(f"Error accessing NIH RePORTER API at offset {offset}: {e}")
+                return []
+
+        results = list(first_page.get('results', []))
+        offsets = range(first_limit, wanted, self.PAGE_SIZE)
+        if offsets:
+            with ThreadPoolExecutor(max_workers=self.PAGE_WORKERS,
+                                    thread_name_prefix="nih-page") as pool:
+                for page_results in pool.map(fetch_offset, offsets):
+                    results.extend(page_results)
+
+        return {'meta': meta, 'results': results[:wanted]}
+
+    async def afetch_nih_reporter(self, search_term: str, limit: int = 5,
+                                  client: Optional[httpx.AsyncClient] = None) -> dict:
+        """Async variant of fetch_nih_reporter over the shared HTTP/2 client"""
+        client = client or get_async_client()
+        try:
+            payload = self._build_payload(search_term, limit)
+
+            response = await client.post(self.base_url, json=payload, headers=self.HEADERS)
             response.raise_for_status()
-            return response.json()
+            return orjson.loads(response.content)
 
-        except requests.exceptions.RequestException as e:
+        except (httpx.HTTPError, orjson.JSONDecodeError) as e:
             print(f"Error accessing NIH RePORTER API: {e}")
             return None
 
-    def parse_nih_projects(self, response_data: dict) -> List[Dict]:
-        """Parse NIH RePORTER response and extract relevant project information"""
-        if not response_data or 'results' not in response_data:
+    def stream_nih_reporter(self, search_term: str, limit: int = 5) -> Iterator[dict]:
+        """Stream raw project results from NIH RePORTER one at a time
+
+        The body is parsed incrementally, so peak memory stays bounded by a
+        single project even for large pages. Response metadata is skipped.
+        """
+        try:
+            payload = self._build_payload(search_term, limit)
+
+            with self.session.post(self.base_url, json=payload, headers=self.HEADERS,
+                                   stream=True, timeout=REQUEST_TIMEOUT) as response:
+                response.raise_for_status()
+                response.raw.decode_content = True
+                yield from ijson.items(response.raw, 'results.item', use_float=True)
+
+        # ijson reads response.raw directly, so urllib3 errors mid-body
+        # (read timeouts, dropped connections, bad gzip) are not wrapped
+        except (requests.exceptions.RequestException, urllib3.exceptions.HTTPError,
+                ijson.JSONError) as e:
+            print(f"Error accessing NIH RePORTER API: {e}")
+
+    def parse_nih_projects(self, response_data: Union[dict, Iterable[dict]]) -> List[Dict]:
+        """Parse NIH RePORTER response and extract relevant project information
+
+        Accepts either a full response dict or an iterable of raw results,
+        such as the one returned by stream_nih_reporter.
+        """
+        if not response_data:
             return []
 
+        if isinstance(response_data, dict):
+            if 'results' not in response_data:
+                return []
+            results = response_data['results']
+        else:
+            results = response_data
+
         projects = []
-        for result in response_data['results']:
+        format_currency = self.format_currency
+        for result in results:
+            get = result.get
+            amount = float(get('award_amount') or 0.0)
             project = {
-                'title': result.get('project_title'),
-                'pi_name': result.get('contact_pi_name'),
-                'organization': result.get('organization_name'),
-                'abstract': result.get('abstract_text', '').strip(),
-                'award_amount': float(result.get('award_amount', 0)),
-                'fiscal_year': result.get('fiscal_year'),
-                'formatted_amount': self.format_currency(float(result.get('award_amount', 0)))
+                'title': get('project_title'),
+                'pi_name': get('contact_pi_name'),
+                'organization': get('organization_name'),
+                'abstract': (get('abstract_text') or '').strip(),
+                'award_amount': amount,
+                'fiscal_year': get('fiscal_year'),
+                'formatted_amount': format_currency(amount)
             }
             projects.append(project)
 
@@ -80,46 +211,51 @@ class NIHFetcher:
             return "No projects found matching the search criteria."
 
         summary = []
+        append = summary.append
         total_results = meta.get('total', 0)
+        n_projects = len(projects)
 
-        summary.append("=== NIH Rare Disease Research Projects ===")
-        summary.append(f"Database Total: {total_results:,} projects")
-        summary.append(f"Showing: Latest {len(projects)} projects\n")
+        append("=== NIH Rare Disease Research Projects ===")
+        append(f"Database Total: {total_results:,} projects")
+        append(f"Showing: Latest {n_projects} projects\n")
 
-        total_funding = sum(p['award_amount'] for p in projects)
+        rule = "-" * 65
+        footer = "\n" + rule + "\n"
+        amounts = [p['award_amount'] for p in projects]
+        total_funding = sum(amounts)
 
         for i, project in enumerate(projects, 1):
-            summary.append(f"Project {i} | FY{project['fiscal_year']} | {project['formatted_amount']}")
-            summary.append("-" * 65)
+            append(f"Project {i} | FY{project['fiscal_year']} | {project['formatted_amount']}")
+            append(rule)
 
-            title = textwrap.fill(project['title'] or "No Title Available", width=65)
-            summary.append(title)
+            title = self._TITLE_WRAP.fill(project['title'] or "No Title Available")
+            append(title)
 
-            summary.append(f"\nPI: {project['pi_name'] or 'Not Available'}")
-            summary.append(f"Institution: {project['organization'] or 'Not Available'}")
+            append(f"\nPI: {project['pi_name'] or 'Not Available'}")
+            append(f"Institution: {project['organization'] or 'Not Available'}")
 
-            if project['abstract']:
-                abstract_preview = project['abstract'][:200] + "..." if len(project['abstract']) > 200 else project['abstract']
-                wrapped_abstract = textwrap.fill(abstract_preview, width=65,
-                                               initial_indent='  ',
-                                               subsequent_indent='  ')
-                summary.append(f"\nAbstract Preview:")
-                summary.append(wrapped_abstract)
+            abstract = project['abstract']
+            if abstract:
+                abstract_preview = abstract[:200] + "..." if len(abstract) > 200 else abstract
+                wrapped_abstract = self._ABSTRACT_WRAP.fill(abstract_preview)
+                append(f"\nAbstract Preview:")
+                append(wrapped_abstract)
 
-            summary.append("\n" + "-" * 65 + "\n")
+            append(footer)
 
         if projects:
-            avg_funding = total_funding / len(projects)
-            summary.append("Funding Overview")
-            summary.append("-" * 15)
-            summary.append(f"Total Funding: {self.format_currency(total_funding)}")
-            summary.append(f"Average Award: {self.format_currency(avg_funding)}")
-            summary.append(f"Largest Award: {self.format_currency(max(p['award_amount'] for p in projects))}")
+            avg_funding = total_funding / n_projects
+            append("Funding Overview")
+            append("-" * 15)
+            append(f"Total Funding: {self.format_currency(total_funding)}")
+            append(f"Average Award: {self.format_currency(avg_funding)}")
+            append(f"Largest Award: {self.format_currency(max(amounts))}")
             if any(p['fiscal_year'] for p in projects):
-                summary.append(f"Latest Fiscal Year: {max(p['fiscal_year'] for p in projects)}")
+                append(f"Latest Fiscal Year: {max(p['fiscal_year'] for p in projects)}")
 
         return "\n".join(summary)
 
+    @cached_summary(FETCH_FAILED)
     def fetch_and_summarize_nih_projects(self, search_term: str = "rare diseases",
                                        limit: int = 5) -> str:
         """Fetch NIH project data and return a formatted summary"""
@@ -127,4 +263,14 @@ class NIHFetcher:
         if response_data:
             projects = self.parse_nih_projects(response_data)
             return self.format_nih_summary(projects, response_data.get('meta', {}))
-        return "Failed to fetch data from NIH RePORTER API"
\ No newline at end of file
+        return FETCH_FAILED
+
+    async def afetch_and_summarize_nih_projects(self, search_term: str = "rare diseases",
+                                                limit: int = 5,
+                                                client: Optional[httpx.AsyncClient] = None) -> str:
+        """Async variant of fetch_and_summarize_nih_projects"""
+        response_data = await self.afetch_nih_reporter(search_term, limit, client)
+        if response_data:
+            projects = self.parse_nih_projects(response_data)
+            return self.format_nih_summary(projects, response_data.get('meta', {}))
+        return FETCH_FAILED
\ No newline at end of file
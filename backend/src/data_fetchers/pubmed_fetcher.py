@@ -1,28 +1,75 @@
+import asyncio
+import httpx
+import orjson
 import requests
-import xml.etree.ElementTree as ET
-from typing import List, Dict
+from io import BytesIO
+from lxml import etree
+from typing import List, Dict, Optional
 import json
-from time import sleep
 
-class PubMedFetcher:
+from .http_client import (HTTPFetcher, REQUEST_TIMEOUT, RateLimiter,
+                          create_async_client, get_async_client)
+from .summary_cache import cached_summary
+
+# Returned when nothing could be fetched; never cached
+NO_RESULTS = "No results found or error occurred"
+
+
+def _full_text(parent, path: str) -> str:
+    """Text of the first element at path including inline markup such as <i>"""
+    if parent is None:
+        return ""
+    element = parent.find(path)
+    return "".join(element.itertext()) if element is not None else ""
+
+
+class PubMedFetcher(HTTPFetcher):
+    # Element paths relative to a PubmedArticle; anchoring them avoids
+    # matching PMIDs or DOIs of cited references further down the record
+    _PMID = "MedlineCitation/PMID"
+    _ARTICLE = "MedlineCitation/Article"
+    _PUB_DATE = "MedlineCitation/Article/Journal/JournalIssue/PubDate"
+    _KEYWORDS = "MedlineCitation/KeywordList/Keyword"
+    _AUTHORS = "MedlineCitation/Article/AuthorList/Author"
+    _DOI = 'PubmedData/ArticleIdList/ArticleId[@IdType="doi"]'
+
     def __init__(self, api_key: str):
+        super().__init__()
         self.api_key = api_key
         self.base_url = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/"
+        # NCBI allows 3 requests/second, or 10 with an API key
+        self._bucket = RateLimiter(10 if api_key else 3)
+
+    def _search_params(self, query: str, max_results: int) -> dict:
+        """Build esearch parameters for a query"""
+        return {
+            "db": "pubmed",
+            "term": query,
+            "retmax": max_results,
+            "api_key": self.api_key,
+            "retmode": "json"
+        }
+
+    def _fetch_params(self, pmids: List[str]) -> dict:
+        """Build efetch parameters for a list of PMIDs"""
+        return {
+            "db": "pubmed",
+            "id": ",".join(pmids),
+            "retmode": "xml",
+            "rettype": "abstract",
+            "api_key": self.api_key
+        }
 
     def fetch_pubmed_data(self, query: str, max_results: int = 5) -> str:
         """Fetch detailed article data from PubMed E-utilities"""
         try:
             # First, search for IDs
             esearch_url = f"{self.base_url}esearch.fcgi"
-            search_params = {
-                "db": "pubmed",
-                "term": query,
-                "retmax": max_results,
-                "api_key": self.api_key,
-                "retmode": "json"
-            }
-
-            search_response = requests.get(esearch_url, params=search_params)
+            search_params = self._search_params(query, max_results)
+
+            self._bucket.wait()
+            search_response = self.session.get(esearch_url, params=search_params,
+                                               timeout=REQUEST_TIMEOUT)
             search_response.raise_for_status()
             search_data = search_response.json()
 
@@ -32,109 +79,198 @@ class PubMedFetcher:
             if not pmids:
                 return {}
 
-            sleep(0.5)  # Respect API rate limits
-
-            # Second, fetch article details
+            # Second, fetch article details; POST keeps long ID lists out of the URL
             efetch_url = f"{self.base_url}efetch.fcgi"
-            fetch_params = {
-                "db": "pubmed",
-                "id": ",".join(pmids),
-                "retmode": "xml",
-                "rettype": "abstract",
-                "api_key": self.api_key
-            }
-
-            fetch_response = requests.get(efetch_url, params=fetch_params)
+            fetch_params = self._fetch_params(pmids)
+
+            self._bucket.wait()
+            fetch_response = self.session.post(efetch_url, data=fetch_params,
+                                               timeout=REQUEST_TIMEOUT)
             fetch_response.raise_for_status()
 
             return fetch_response.text
 
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, KeyError) as e:
+            print(f"Error: {e}")
+            return None
+
+    async def _asearch_pmids(self, query: str, max_results: int,
+                             client: httpx.AsyncClient) -> List[str]:
+        """Run one esearch call and return the matching PMIDs"""
+        await self._bucket.async_wait()
+        search_response = await client.get(f"{self.base_url}esearch.fcgi",
+                                           params=self._search_params(query, max_results))
+        search_response.raise_for_status()
+        return orjson.loads(search_response.content)['esearchresult']['idlist']
+
+    async def _afetch_articles(self, pmids: List[str], client: httpx.AsyncClient) -> str:
+        """Fetch the article XML for a list of PMIDs in one efetch POST"""
+        await self._bucket.async_wait()
+        fetch_response = await client.post(f"{self.base_url}efetch.fcgi",
+                                           data=self._fetch_params(pmids))
+        fetch_response.raise_for_status()
+        return fetch_response.text
+
+    async def afetch_pubmed_data(self, query: str, max_results: int = 5,
+                                 client: Optional[httpx.AsyncClient] = None) -> str:
+        """Async variant of fetch_pubmed_data over the shared HTTP/2 client"""
+        client = client or get_async_client()
+        try:
+            pmids = await self._asearch_pmids(query, max_results, client)
+
+            if not pmids:
+                return {}
+
+            return await self._afetch_articles(pmids, client)
+
+        # A 200 with an HTML or error body has no esearchresult.idlist
+        except (httpx.HTTPError, orjson.JSONDecodeError, KeyError) as e:
+            print(f"Error: {e}")
+            return None
+
+    async def afetch_pubmed_batch(self, queries: List[str], max_results: int = 5,
+                                  client: Optional[httpx.AsyncClient] = None) -> str:
+        """Fetch article data for several queries with a single efetch
+
+        The esearch calls run concurrently, paced by the rate limiter, and the
+        union of their PMIDs is fetched in one round trip.
+        """
+        client = client or get_async_client()
+        try:
+            id_lists = await asyncio.gather(
+                *(self._asearch_pmids(query, max_results, client) for query in queries)
+            )
+            # Keep first-seen order while dropping PMIDs shared between queries
+            pmids = list(dict.fromkeys(pmid for ids in id_lists for pmid in ids))
+
+            if not pmids:
+                return {}
+
+            return await self._afetch_articles(pmids, client)
+
+        # A 200 with an HTML or error body has no esearchresult.idlist
+        except (httpx.HTTPError, orjson.JSONDecodeError, KeyError) as e:
             print(f"Error: {e}")
             return None
 
+    def fetch_pubmed_batch(self, queries: List[str], max_results: int = 5) -> str:
+        """Blocking wrapper around afetch_pubmed_batch for code without an event loop"""
+        async def run():
+            # A dedicated client, the shared one belongs to the app's loop
+            async with create_async_client() as client:
+                return await self.afetch_pubmed_batch(queries, max_results, client)
+
+        return asyncio.run(run())
+
     def parse_pubmed_articles(self, xml_content: str) -> List[Dict]:
-        """Parse PubMed XML content and extract information"""
+        """Parse PubMed XML content and extract information
+
+        Articles are streamed one at a time and freed once read, so memory
+        stays bounded by a single article.
+        """
         if not xml_content:
             return []
 
-        root = ET.fromstring(xml_content)
+        if isinstance(xml_content, str):
+            xml_content = xml_content.encode()
+
         articles = []
 
-        for article in root.findall('.//PubmedArticle'):
+        for _, article in etree.iterparse(BytesIO(xml_content), tag="PubmedArticle"):
             article_data = {}
+            art = article.find(self._ARTICLE)
 
             # Basic article information
-            article_data['pmid'] = article.find('.//PMID').text if article.find('.//PMID') is not None else None
-            article_data['title'] = article.find('.//ArticleTitle').text if article.find('.//ArticleTitle') is not None else None
+            article_data['pmid'] = article.findtext(self._PMID) or None
+            article_data['title'] = _full_text(art, 'ArticleTitle') or None
 
             # Journal info
-            journal = article.find('.//Journal')
-            if journal is not None:
-                article_data['journal'] = journal.find('.//Title').text if journal.find('.//Title') is not None else None
+            journal = art.findtext('Journal/Title') if art is not None else None
+            if journal:
+                article_data['journal'] = journal
 
             # Publication date
-            pub_date = article.find('.//PubDate')
+            pub_date = article.find(self._PUB_DATE)
             if pub_date is not None:
-                year = pub_date.find('Year').text if pub_date.find('Year') is not None else None
-                month = pub_date.find('Month').text if pub_date.find('Month') is not None else None
-                article_data['publication_date'] = f"{year} {month}".strip() if year else None
+                year = pub_date.findtext('Year')
+                if year:
+                    article_data['publication_date'] = f"{year} {pub_date.findtext('Month') or ''}".strip()
 
             # Abstract
-            abstract = article.find('.//Abstract/AbstractText')
-            if abstract is not None:
-                article_data['abstract'] = abstract.text
+            abstract = _full_text(art, 'Abstract/AbstractText')
+            if abstract:
+                article_data['abstract'] = abstract
 
             # Keywords
-            keywords = article.findall('.//Keyword')
+            keywords = [k.text for k in article.iterfind(self._KEYWORDS)]
             if keywords:
-                article_data['keywords'] = [k.text for k in keywords]
+                article_data['keywords'] = keywords
 
             # Authors
-            authors = article.findall('.//Author')
+            authors = []
+            for author in article.iterfind(self._AUTHORS):
+                last_name = author.findtext('LastName')
+                fore_name = author.findtext('ForeName')
+                if last_name is not None and fore_name is not None:
+                    authors.append(f"{fore_name} {last_name}")
             if authors:
-                article_data['authors'] = []
-                for author in authors:
-                    if author.find('LastName') is not None and author.find('ForeName') is not None:
-                        author_name = f"{author.find('ForeName').text} {author.find('LastName').text}"
-                        article_data['authors'].append(author_name)
+                article_data['authors'] = authors
 
             # DOI
-            doi = article.find('.//ArticleId[@IdType="doi"]')
-            if doi is not None:
-                article_data['doi'] = doi.text
+            doi = article.findtext(self._DOI)
+            if doi:
+                article_data['doi'] = doi
 
             articles.append(article_data)
 
+            # Free the parsed article and any siblings already processed
+            article.clear()
+            while article.getprevious() is not None:
+                del article.getparent()[0]
+
         return articles
 
     def format_disease_summary(self, articles: List[Dict]) -> str:
         """Format the parsed articles into a readable summary"""
         summary = []
+        append = summary.append
 
         for article in articles:
-            summary.append("\n=== Article Summary ===")
-            summary.append(f"Title: {article.get('title', 'N/A')}")
-            summary.append(f"Authors: {', '.join(article.get('authors', ['N/A']))}")
-            summary.append(f"Journal: {article.get('journal', 'N/A')}")
-            summary.append(f"Publication Date: {article.get('publication_date', 'N/A')}")
+            get = article.get
+            append("\n=== Article Summary ===")
+            append(f"Title: {get('title', 'N/A')}")
+            append(f"Authors: {', '.join(get('authors', ['N/A']))}")
+            append(f"Journal: {get('journal', 'N/A')}")
+            append(f"Publication Date: {get('publication_date', 'N/A')}")
 
-            if article.get('keywords'):
-                summary.append(f"Keywords: {', '.join(article.get('keywords', []))}")
+            keywords = get('keywords')
+            if keywords:
+                append(f"Keywords: {', '.join(keywords)}")
 
-            if article.get('abstract'):
-                summary.append("\nAbstract:")
-                summary.append(article.get('abstract'))
+            abstract = get('abstract')
+            if abstract:
+                append("\nAbstract:")
+                append(abstract)
 
-            summary.append(f"\nDOI: {article.get('doi', 'N/A')}")
-            summary.append("\n")
+            append(f"\nDOI: {get('doi', 'N/A')}")
+            append("\n")
 
         return "\n".join(summary)
 
+    @cached_summary(NO_RESULTS)
     def fetch_and_summarize(self, query: str, max_results: int = 5) -> str:
         """Fetch PubMed data and return a formatted summary"""
         xml_content = self.fetch_pubmed_data(query, max_results)
         if xml_content:
             articles = self.parse_pubmed_articles(xml_content)
             return self.format_disease_summary(articles)
-        return "No results found or error occurred"
\ No newline at end of file
+        return NO_RESULTS
+
+    async def afetch_and_summarize(self, query: str, max_results: int = 5,
+                                   client: Optional[httpx.AsyncClient] = None) -> str:
+        """Async variant of fetch_and_summarize"""
+        xml_content = await self.afetch_pubmed_data(query, max_results, client)
+        if xml_content:
+            articles = self.parse_pubmed_articles(xml_content)
+            return self.format_disease_summary(articles)
+        return NO_RESULTS
\ No newline at end of file
@@ -0,0 +1,36 @@
+import threading
+from functools import wraps
+
+from cachetools import TTLCache
+from cachetools.keys import hashkey
+
+
+def cached_summary(failure: str, maxsize: int = 128, ttl: int = 3600):
+    """Cache a fetcher's summary per argument list for `ttl` seconds
+
+    The cache is shared by every instance of the fetcher. The failure
+    message is never cached, so a transient outage is retried on the next
+    call instead of being served for the rest of the hour.
+    """
+    def decorator(method):
+        cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        lock = threading.Lock()
+
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            key = hashkey(*args, **kwargs)
+            with lock:
+                result = cache.get(key)
+            if result is not None:
+                return result
+
+            result = method(self, *args, **kwargs)
+            if result != failure:
+                with lock:
+                    cache[key] = result
+            return result
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
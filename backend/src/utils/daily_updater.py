@@ -1,64 +1,68 @@
-import schedule
-import time
-from datetime import datetime
+import asyncio
+import logging
+from datetime import datetime, timedelta
 from typing import Optional
 
 from ..assistant.medical_research_assistant import MedicalResearchAssistant
 from .database_handler import MedicalResearchDB
 
+logger = logging.getLogger(__name__)
+
 class DailyAnalysisUpdater:
     def __init__(self, assistant: Optional[MedicalResearchAssistant] = None):
         """Initialize updater with optional assistant instance"""
         self.assistant = assistant or MedicalResearchAssistant()
         self.db = MedicalResearchDB()
 
-    def update_all_analyses(self):
-        """Update all types of analyses"""
+    async def update_all_analyses(self):
+        """Update all types of analyses
+
+        The three analyses share one summary LLM call and are stored once
+        all have finished.
+        """
         try:
             self.db.connect()
 
-            # Update trends analysis
-            trends = self.assistant.fetch_analysis("recent_trends")
-            self.db.store_daily_analysis(
-                "trends",
-                trends,
-                {"source": "multiple", "analysis_type": "trends"}
-            )
-
-            # Update clinical analysis
-            clinical = self.assistant.fetch_analysis("clinical")
-            self.db.store_daily_analysis(
-                "clinical",
-                clinical,
-                {"source": "multiple", "analysis_type": "clinical"}
-            )
+            analyses = await self.assistant.fetch_analyses(["recent_trends", "clinical", "research"])
+            trends = analyses["recent_trends"]
+            clinical = analyses["clinical"]
+            research = analyses["research"]
 
-            # Update research analysis
-            research = self.assistant.fetch_analysis("research")
-            self.db.store_daily_analysis(
-                "research",
-                research,
-                {"source": "multiple", "analysis_type": "research"}
-            )
+            # One bulk upsert for all three analyses
+            self.db.store_daily_analyses_bulk([
+                ("trends", trends, {"source": "multiple", "analysis_type": "trends"}),
+                ("clinical", clinical, {"source": "multiple", "analysis_type": "clinical"}),
+                ("research", research, {"source": "multiple", "analysis_type": "research"})
+            ])
 
-            print(f"Successfully updated all analyses at {datetime.now()}")
+            logger.info("Successfully updated all analyses")
 
         except Exception as e:
-            print(f"Error updating analyses: {e}")
-        finally:
-            self.db.close()
+            logger.error("Error updating analyses: %s", e)
 
-    def start_scheduler(self, update_time: str = "00:00"):
-        """Start the daily update scheduler"""
-        print(f"Starting scheduler, will update daily at {update_time}")
+    def run_update(self):
+        """Run update_all_analyses to completion from synchronous code"""
+        asyncio.run(self.update_all_analyses())
 
-        schedule.every().day.at(update_time).do(self.update_all_analyses)
+    async def start_scheduler(self, update_time: str = "00:00"):
+        """Start the daily update scheduler
 
+        Sleeps straight through to the next run instead of polling, so the
+        process wakes once per day.
+        """
+        logger.info("Starting scheduler, will update daily at %s", update_time)
+
+        hour, minute = map(int, update_time.split(":"))
         while True:
-            schedule.run_pending()
-            time.sleep(60)  # Check every minute
+            now = datetime.now()
+            next_run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+            if next_run <= now:
+                next_run += timedelta(days=1)
+
+            await asyncio.sleep((next_run - now).total_seconds())
+            await self.update_all_analyses()
 
     def update_now(self):
         """Manually trigger an update"""
-        print("Manually triggering analysis update...")
-        self.update_all_analyses()
\ No newline at end of file
+        logger.info("Manually triggering analysis update...")
+        self.run_update()
\ No newline at end of file
@@ -1,41 +1,177 @@
+import asyncio
 import certifi
-from pymongo import MongoClient
+import logging
+import os
+import threading
+from collections import deque
+from dotenv import load_dotenv
+from pymongo import MongoClient, UpdateOne
+from pymongo.cursor import Cursor
+from pymongo.errors import BulkWriteError
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict
-import json
+from typing import Optional, List, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+DATABASE_NAME = "medical_data"
+
+
+def mongodb_uri() -> str:
+    """Return the MongoDB URI from MONGODB_URI
+
+    Credentials come from the environment (.env locally, the Render
+    dashboard in production), never from source.
+    """
+    load_dotenv()
+    uri = os.getenv("MONGODB_URI")
+    if not uri:
+        raise ValueError("MONGODB_URI is required")
+    return uri
+
 
 class MedicalResearchDB:
+    # MongoClient is thread-safe and pooled, so every instance in the process
+    # shares one client instead of paying a TLS handshake and SRV lookup per run
+    _client: Optional[MongoClient] = None
+    _client_lock = threading.Lock()
+
+    # While the flusher task runs, query history is written in batches of up
+    # to QUERY_BATCH_SIZE, QUERY_FLUSH_INTERVAL seconds after the first queued
+    # result. A failed batch is retried QUERY_RETRY_DELAY seconds later, up to
+    # QUERY_MAX_ATTEMPTS writes per document
+    QUERY_FLUSH_INTERVAL = 0.05
+    QUERY_BATCH_SIZE = 100
+    QUERY_RETRY_DELAY = 1.0
+    QUERY_MAX_ATTEMPTS = 3
+
+    # Shared by the sync client and the app's Motor client. Summaries and
+    # query responses are long LLM text, so compress them on the wire;
+    # compressors whose module is not installed are skipped by the driver
+    CLIENT_OPTIONS = {
+        "tlsCAFile": certifi.where(),
+        "compressors": "zstd,snappy",
+        "maxPoolSize": 50,
+        "minPoolSize": 1,
+        "serverSelectionTimeoutMS": 3000
+    }
+
     def __init__(self):
         """Initialize MongoDB connection for medical research data"""
-        self.username = "sharan"
-        self.password = "sharan123"
-        self.cluster_url = "cluster0.t7u2a.mongodb.net"
-        self.database_name = "medical_data"
-        self.uri = f"mongodb+srv://{self.username}:{self.password}@{self.cluster_url}/?retryWrites=true&w=majority"
+        self.database_name = DATABASE_NAME
         self.client = None
         self.db = None
+        # analysis_type -> (date, summary); analyses change once a day, so a
+        # summary for today is served without another round trip
+        self._latest_cache: Dict[str, Tuple[str, str]] = {}
+        # (failed attempts, document) pairs waiting for the flusher
+        self._query_queue: deque = deque()
+        self._query_flusher: Optional[asyncio.Task] = None
+        self._query_pending: Optional[asyncio.Event] = None
+        self._flusher_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def uri(self) -> str:
+        """Connection URI, read from the environment when a client is built"""
+        return mongodb_uri()
+
+    @classmethod
+    def get_client(cls, uri: str) -> MongoClient:
+        """Return the process-wide client, connecting on first use"""
+        with cls._client_lock:
+            if cls._client is None:
+                client = MongoClient(uri, **cls.CLIENT_OPTIONS)
+                client.admin.command('ping')
+                cls._client = client
+                logger.info("Successfully connected to MongoDB!")
+            return cls._client
+
+    @classmethod
+    def close_client(cls):
+        """Close the process-wide client, e.g. at shutdown"""
+        with cls._client_lock:
+            if cls._client is not None:
+                cls._client.close()
+                cls._client = None
+                logger.info("MongoDB connection closed.")
+
+    def connect(self, client=None):
+        """Bind to MongoDB, reusing the process-wide client
+
+        Calling it again is a no-op once bound.
+
+        Args:
+            client: Optional already-connected client (e.g. a shared Motor
+                client). Its lifetime is managed by the caller.
+        """
+        if client is not None:
+            self.client = client
+            self.db = self.client[self.database_name]
+            return
+
+        if self.db is not None:
+            return
 
-    def connect(self):
-        """Establish connection to MongoDB"""
         try:
-            self.client = MongoClient(self.uri, tlsCAFile=certifi.where())
+            self.client = self.get_client(self.uri)
             self.db = self.client[self.database_name]
-            self.client.admin.command('ping')
-            print("Successfully connected to MongoDB!")
+            self._ensure_indexes()
         except Exception as e:
-            print(f"Error connecting to MongoDB: {e}")
+            logger.error("Error connecting to MongoDB: %s", e)
             raise
 
+    def _ensure_indexes(self):
+        """Create the indexes behind the latest-analysis and recent-query reads
+
+        create_index is idempotent, so this is safe on every connect.
+        """
+        # find_one({"type": ...}) sorted by newest timestamp walks one entry
+        self.db["daily_analysis"].create_index(
+            [("type", 1), ("timestamp", -1)],
+            name="type_timestamp",
+            background=True
+        )
+        # get_recent_queries becomes a bounded index walk, not a blocking sort
+        self.db["query_history"].create_index(
+            [("timestamp", -1)],
+            name="timestamp",
+            background=True
+        )
+
     def close(self):
-        """Close MongoDB connection"""
-        if self.client:
-            self.client.close()
-            print("MongoDB connection closed.")
+        """Release this instance's binding; the shared client stays open"""
+        self.client = None
+        self.db = None
+
+    @staticmethod
+    def build_daily_analysis(analysis_type: str,
+                             summary_text: str,
+                             metadata: Optional[Dict] = None,
+                             content_hash: Optional[str] = None,
+                             now: Optional[datetime] = None) -> Dict:
+        """Build the daily_analysis document for today's run
+
+        Args:
+            content_hash: Fingerprint of the source content the summary was
+                generated from, used to skip regenerating unchanged analyses
+            now: Time of the run, read from the clock when not given
+        """
+        now = now or datetime.now()
+        document = {
+            "date": now.strftime('%Y-%m-%d'),
+            "type": analysis_type,
+            "summary": summary_text,
+            "timestamp": now,
+            "metadata": metadata or {}
+        }
+        if content_hash:
+            document["content_hash"] = content_hash
+        return document
 
     def store_daily_analysis(self,
                            analysis_type: str,
                            summary_text: str,
-                           metadata: Optional[Dict] = None) -> bool:
+                           metadata: Optional[Dict] = None,
+                           now: Optional[datetime] = None) -> bool:
         """
         Store daily analysis results
 
@@ -43,60 +179,107 @@ class MedicalResearchDB:
             analysis_type: "trends", "clinical", or "research"
             summary_text: The analysis text to store
             metadata: Additional metadata about the analysis
+            now: Time of the run, so callers storing several analyses can
+                share one clock read; read from the clock when not given
         """
         try:
             collection = self.db["daily_analysis"]
 
-            today = datetime.now().strftime('%Y-%m-%d')
-
-            document = {
-                "date": today,
-                "type": analysis_type,
-                "summary": summary_text,
-                "timestamp": datetime.now(),
-                "metadata": metadata or {}
-            }
+            # date and timestamp both come from the same single clock read
+            document = self.build_daily_analysis(analysis_type, summary_text, metadata, now=now)
+            today = document["date"]
 
             # Update if exists for today, insert if not
-            result = collection.update_one(
+            collection.update_one(
                 {"date": today, "type": analysis_type},
                 {"$set": document},
                 upsert=True
             )
+            self._latest_cache[analysis_type] = (today, summary_text)
 
-            print(f"Stored {analysis_type} analysis for {today}")
+            logger.info("Stored %s analysis for %s", analysis_type, today)
             return True
 
         except Exception as e:
-            print(f"Error storing {analysis_type} analysis: {e}")
+            logger.error("Error storing %s analysis: %s", analysis_type, e)
+            return False
+
+    def store_daily_analyses_bulk(self,
+                                  entries: List[Tuple[str, str, Optional[Dict]]]) -> bool:
+        """
+        Store several daily analyses in a single round trip
+
+        Args:
+            entries: (analysis_type, summary_text, metadata) tuples, upserted
+                for today like store_daily_analysis
+        """
+        try:
+            collection = self.db["daily_analysis"]
+
+            now = datetime.now()
+            operations = []
+            for analysis_type, summary_text, metadata in entries:
+                document = self.build_daily_analysis(analysis_type, summary_text, metadata, now=now)
+                operations.append(UpdateOne(
+                    {"date": document["date"], "type": analysis_type},
+                    {"$set": document},
+                    upsert=True
+                ))
+
+            if operations:
+                collection.bulk_write(operations, ordered=False)
+
+            today = now.strftime('%Y-%m-%d')
+            for analysis_type, summary_text, _ in entries:
+                self._latest_cache[analysis_type] = (today, summary_text)
+
+            logger.info("Stored %d analyses for %s", len(operations), today)
+            return True
+
+        except Exception as e:
+            logger.error("Error storing daily analyses: %s", e)
             return False
 
     def get_latest_analysis(self, analysis_type: str) -> Optional[str]:
         """Get most recent analysis of specified type"""
+        today = datetime.now().strftime('%Y-%m-%d')
+        cached = self._latest_cache.get(analysis_type)
+        if cached and cached[0] == today:
+            return cached[1]
+
         try:
             collection = self.db["daily_analysis"]
+            # Only what is returned (and cached) crosses the wire
             document = collection.find_one(
                 {"type": analysis_type},
+                projection={"summary": 1, "date": 1, "_id": 0},
                 sort=[("timestamp", -1)]
             )
 
             if document:
+                # Older analyses are not cached so today's run is picked up
+                if document.get("date") == today:
+                    self._latest_cache[analysis_type] = (today, document["summary"])
                 return document["summary"]
-            print(f"No {analysis_type} analysis found")
+            logger.info("No %s analysis found", analysis_type)
             return None
 
         except Exception as e:
-            print(f"Error retrieving {analysis_type} analysis: {e}")
+            logger.error("Error retrieving %s analysis: %s", analysis_type, e)
             return None
 
     def store_query_result(self,
                           query: str,
                           response: str,
                           metadata: Optional[Dict] = None) -> bool:
-        """Store user query and its response"""
-        try:
-            collection = self.db["query_history"]
+        """Store user query and its response
 
+        With the flusher running the document is queued for the next batch,
+        trading a few milliseconds of durability for far fewer round trips,
+        and True means it was accepted for writing; otherwise it is inserted
+        right away.
+        """
+        try:
             document = {
                 "timestamp": datetime.now(),
                 "query": query,
@@ -104,20 +287,120 @@ class MedicalResearchDB:
                 "metadata": metadata or {}
             }
 
+            if self._query_flusher is not None and not self._query_flusher.done():
+                self._query_queue.append((0, document))
+                # Usually called from a worker thread; wake the flusher on its loop
+                self._flusher_loop.call_soon_threadsafe(self._query_pending.set)
+                return True
+
+            collection = self.db["query_history"]
             collection.insert_one(document)
             return True
 
         except Exception as e:
-            print(f"Error storing query result: {e}")
+            logger.error("Error storing query result: %s", e)
             return False
 
-    def get_recent_queries(self, limit: int = 10) -> List[Dict]:
-        """Get recent user queries and responses"""
+    async def start_query_flusher(self):
+        """Start batching store_query_result inserts on the running loop"""
+        if self._query_flusher is None or self._query_flusher.done():
+            await asyncio.to_thread(self.connect)
+            self._flusher_loop = asyncio.get_running_loop()
+            self._query_pending = asyncio.Event()
+            if self._query_queue:
+                self._query_pending.set()
+            self._query_flusher = asyncio.create_task(self._flush_queries_periodically())
+
+    async def stop_query_flusher(self):
+        """Stop the flusher and write whatever is still queued"""
+        if self._query_flusher is not None:
+            self._query_flusher.cancel()
+            try:
+                await self._query_flusher
+            except asyncio.CancelledError:
+                pass
+            self._query_flusher = None
+        while not await self.flush_queries():
+            await asyncio.sleep(self.QUERY_RETRY_DELAY)
+
+    async def _flush_queries_periodically(self):
+        pending = self._query_pending
+        while True:
+            # Sleep until something is queued, then let the burst accumulate
+            await pending.wait()
+            await asyncio.sleep(self.QUERY_FLUSH_INTERVAL)
+            pending.clear()
+            if not await self.flush_queries():
+                await asyncio.sleep(self.QUERY_RETRY_DELAY)
+                pending.set()
+
+    async def flush_queries(self) -> bool:
+        """Write queued query results with insert_many, off the event loop
+
+        Documents from a failed write are queued again until they reach
+        QUERY_MAX_ATTEMPTS. insert_many assigns each document its _id, so a
+        retry cannot duplicate a document that was written before the error.
+
+        Returns:
+            False if some documents were queued again for a retry
+        """
+        queue = self._query_queue
+        while queue:
+            entries = [queue.popleft() for _ in range(min(len(queue), self.QUERY_BATCH_SIZE))]
+            batch = [document for _, document in entries]
+            try:
+                await asyncio.to_thread(
+                    self.db["query_history"].insert_many, batch, ordered=False
+                )
+                continue
+            except BulkWriteError as e:
+                # Duplicate keys were written by an earlier attempt
+                failed = {error["index"] for error in e.details["writeErrors"]
+                          if error["code"] != 11000}
+                failed = [entries[index] for index in sorted(failed)]
+                if failed:
+                    logger.error("Error storing %d query results: %s", len(failed), e)
+            except Exception as e:
+                failed = entries
+                logger.error("Error storing %d query results: %s", len(failed), e)
+
+            retry = [(attempts + 1, document) for attempts, document in failed
+                     if attempts + 1 < self.QUERY_MAX_ATTEMPTS]
+            if len(retry) < len(failed):
+                logger.error("Dropping %d query results after %d attempts",
+                             len(failed) - len(retry), self.QUERY_MAX_ATTEMPTS)
+            if retry:
+                queue.extendleft(reversed(retry))
+                return False
+
+        return True
+
+    def iter_recent_queries(self, limit: int = 10,
+                            fields: Optional[Tuple[str, ...]] = ("query", "response", "timestamp")) -> Cursor:
+        """Iterate recent user queries and responses without materializing them
+
+        The whole result arrives in one batch of `limit` documents, and
+        callers can start serializing as soon as it does.
+
+        Args:
+            fields: Fields to return; None returns whole documents
+        """
+        collection = self.db["query_history"]
+        projection = {field: 1 for field in fields} if fields else None
+        if projection is not None and "_id" not in fields:
+            projection["_id"] = 0
+        return collection.find(projection=projection, batch_size=limit).sort("timestamp", -1).limit(limit)
+
+    def get_recent_queries(self, limit: int = 10,
+                           fields: Optional[Tuple[str, ...]] = ("query", "response", "timestamp")) -> List[Dict]:
+        """Get recent user queries and responses
+
+        Args:
+            fields: Fields to return; None returns whole documents
+        """
         try:
-            collection = self.db["query_history"]
-            cursor = collection.find().sort("timestamp", -1).limit(limit)
-            return list(cursor)
+            return list(self.iter_recent_queries(limit, fields))
 
         except Exception as e:
-            print(f"Error retrieving recent queries: {e}")
+            logger.error("Error retrieving recent queries: %s", e)
             return []
\ No newline at end of file
@@ -1,34 +1,66 @@
+from bisect import bisect_right
 from typing import Dict, List
 import textwrap
 from datetime import datetime
+from functools import lru_cache
+
+
+# format_currency scale per bracket: amounts below 1K, below 1M, and above
+_CURRENCY_THRESHOLDS = (1_000, 1_000_000)
+_CURRENCY_SCALES = ((1, "", ".2f"), (1_000, "K", ".1f"), (1_000_000, "M", ".1f"))
+
+
+@lru_cache(maxsize=32)
+def _text_wrapper(width: int, indent: str) -> textwrap.TextWrapper:
+    """Shared TextWrapper per (width, indent) so wrap_text does not build one per call"""
+    return textwrap.TextWrapper(width=width, initial_indent=indent,
+                                subsequent_indent=indent)
+
+
+@lru_cache(maxsize=4096)
+def _format_date(date_str: str, input_format: str, output_format: str) -> str:
+    """Pure strptime/strftime round trip; repeated dates skip the slow parse"""
+    try:
+        date_obj = datetime.strptime(date_str, input_format)
+        return date_obj.strftime(output_format)
+    except (ValueError, TypeError):
+        return date_str
+
+
+# Every bar of the default width, indexed by filled cells
+_BARS_50 = tuple("█" * i + "-" * (50 - i) for i in range(51))
+
+
+def _join_row(columns, widths) -> str:
+    return " | ".join("%-*s" % (width, text) for text, width in zip(columns, widths))
+
+
+# Header and other repeated rows are rendered once
+_cached_row = lru_cache(maxsize=256)(_join_row)
+
 
 class DataFormatter:
     @staticmethod
     def format_currency(amount: float) -> str:
         """Format currency with appropriate suffix for large numbers"""
-        if amount >= 1_000_000:
-            return f"${amount/1_000_000:.1f}M"
-        elif amount >= 1_000:
-            return f"${amount/1_000:.1f}K"
-        else:
-            return f"${amount:.2f}"
+        divisor, suffix, spec = _CURRENCY_SCALES[bisect_right(_CURRENCY_THRESHOLDS, amount)]
+        return f"${amount/divisor:{spec}}{suffix}"
 
     @staticmethod
     def wrap_text(text: str, width: int = 80, indent: str = "") -> str:
         """Wrap text to specified width with optional indentation"""
         if not text:
             return ""
-        return textwrap.fill(text, width=width, initial_indent=indent,
-                           subsequent_indent=indent)
+        return _text_wrapper(width, indent).fill(text)
 
     @staticmethod
     def format_date(date_str: str, input_format: str = "%Y-%m-%d",
                    output_format: str = "%B %d, %Y") -> str:
         """Format date string to desired format"""
         try:
-            date_obj = datetime.strptime(date_str, input_format)
-            return date_obj.strftime(output_format)
-        except (ValueError, TypeError):
+            return _format_date(date_str, input_format, output_format)
+        except TypeError:
+            # Unhashable input, which strptime would reject anyway
             return date_str
 
     @staticmethod
@@ -43,6 +75,14 @@ class DataFormatter:
             return "N/A"
         return separator.join(items)
 
+    @staticmethod
+    def format_list_items_bytes(items: List[bytes], separator: bytes = b", ") -> bytes:
+        """Bytes variant of format_list_items for output written straight to a
+        socket or file, skipping the str round trip and a later encode()"""
+        if not items:
+            return b"N/A"
+        return separator.join(items)
+
     @staticmethod
     def create_section_header(title: str, char: str = "=") -> str:
         """Create a section header with title and underline"""
@@ -56,15 +96,17 @@ class DataFormatter:
     @staticmethod
     def create_table_row(columns: List[str], widths: List[int]) -> str:
         """Create a formatted table row with specified column widths"""
-        row = []
-        for text, width in zip(columns, widths):
-            row.append(str(text).ljust(width))
-        return " | ".join(row)
+        # Keyed on the rendered cells: 1, 1.0 and True are equal keys but
+        # render differently
+        return _cached_row(tuple(map(str, columns)), tuple(widths))
 
     @staticmethod
     def create_progress_bar(value: float, total: float, width: int = 50) -> str:
         """Create a text-based progress bar"""
         percentage = value / total
         filled = int(width * percentage)
-        bar = "█" * filled + "-" * (width - filled)
+        if width == 50 and 0 <= filled <= 50:
+            bar = _BARS_50[filled]
+        else:
+            bar = "█" * filled + "-" * (width - filled)
         return f"[{bar}] {percentage:.1%}"
\ No newline at end of file
@@ -1,51 +1,50 @@
 
 from typing import List
+import re
 import textwrap
 
+# Built once; textwrap.fill would construct and discard a wrapper per line
+_WRAPPER = textwrap.TextWrapper(width=80, break_long_words=False)
+_BANNER = "=" * 80
+
+# One match per section: a bullet or paragraph line plus the non-blank,
+# non-bullet lines that follow it; blank lines only separate sections
+_BLOCK_RE = re.compile(
+    r"^(?:[•\-][^\n]*|[^\S\n]*\S[^\n]*)(?:\n(?![•\-])[^\S\n]*\S[^\n]*)*",
+    re.MULTILINE
+)
+
 class ResponseFormatter:
     @staticmethod
     def format_sections(text: str) -> str:
         """Format response into clear sections with proper spacing"""
-        lines = text.split('\n')
         formatted_lines = []
-        current_section = []
-
-        for line in lines:
-            if line.startswith('•') or line.startswith('-'):
-                if current_section:
-                    formatted_lines.extend(current_section)
-                    formatted_lines.append('')
-                current_section = [line]
-            elif line.strip() == '':
-                if current_section:
-                    formatted_lines.extend(current_section)
-                    formatted_lines.append('')
-                current_section = []
-            else:
-                wrapped = textwrap.fill(line, width=80)
-                current_section.extend(wrapped.split('\n'))
-
-        if current_section:
-            formatted_lines.extend(current_section)
+        end = 0
+
+        for block in _BLOCK_RE.finditer(text):
+            lines = block.group().split('\n')
+            # A leading bullet is kept as is; every other line is wrapped
+            if lines[0].startswith(('•', '-')):
+                formatted_lines.append(lines[0])
+                lines = lines[1:]
+            for line in lines:
+                formatted_lines.extend(_WRAPPER.wrap(line))
+            formatted_lines.append('')
+            end = block.end()
+
+        # Sections are separated by a blank line; the last one only gets
+        # it if blank lines follow it
+        if formatted_lines and end == len(text):
+            formatted_lines.pop()
 
         return '\n'.join(formatted_lines)
 
     @staticmethod
     def add_summary_header(query: str, text: str) -> str:
         """Add a header with the query and formatting"""
-        header = [
-            "=" * 80,
-            f"Query: {query}",
-            "=" * 80,
-            "",
-            text
-        ]
-        return '\n'.join(header)
+        return f"{_BANNER}\nQuery: {query}\n{_BANNER}\n\n{text}"
 
     @staticmethod
     def format_key_findings(findings: List[str]) -> str:
         """Format key findings with bullets and proper spacing"""
-        formatted = ["Key Findings:", ""]
-        for finding in findings:
-            formatted.append(f"• {finding}")
-        return '\n'.join(formatted)
\ No newline at end of file
+        return '\n'.join(("Key Findings:", "", *(f"• {finding}" for finding in findings)))
\ No newline at end of file